@@ -0,0 +1,818 @@
+"""Perhitungan analitik dashboard harga tanpa ketergantungan pada Streamlit atau Plotly.
+
+Modul ini hanya memakai pandas/NumPy (dan data_store untuk memuat data),
+sehingga dapat diimpor oleh skrip lain, benchmark, atau proses batch tanpa
+menjalankan antarmuka dashboard.
+"""
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+import data_store
+
+# Pola satu entri andil komoditas, mis. "BERAS (0.4229)" atau "CABAI RAWIT(0,911)"
+COMMODITY_PATTERN = r'(?P<Komoditas>[^;()]+?)\s*\(\s*(?P<Andil>-?\d+(?:[.,]\d+)?)\s*\)'
+COMMODITY_COLUMN = 'Komoditas Andil Perubahan Harga'
+FLUCTUATION_COLUMN = 'Fluktuasi Harga Tertinggi'
+# Isian kolom fluktuasi yang bukan nama komoditas (dibandingkan dalam huruf besar)
+FLUCTUATION_PLACEHOLDERS = {'-', 'NODATA', 'STABIL', 'TDK ADA DATA DR PUSAT'}
+PRICE_CHANGE = 'Indikator Perubahan Harga (%)'
+DISPARITY = 'Disparitas Harga Antar Daerah'
+
+# Resolusi waktu untuk grafik tren dan frekuensi Period pandas-nya
+# (mingguan memakai Periode_Minggu yang sudah dihitung saat load)
+TREND_RESOLUTIONS = {
+    'Mingguan': None,
+    'Bulanan': 'M',
+    'Kuartalan': 'Q',
+}
+
+# Metrik yang diringkas dalam cube agregat
+CUBE_METRICS = ['Indikator Perubahan Harga (%)', 'Nilai', 'Disparitas Harga Antar Daerah']
+CUBE_STATS = {'count': 'sum', 'sum': 'sum', 'sumsq': 'sum', 'min': 'min', 'max': 'max'}
+
+# Statistik untuk mereduksi grafik batang menjadi satu batang per kabupaten/kota
+DISTRICT_STATISTICS = ['Terbaru', 'Rata-rata', 'Maksimum']
+
+# Tabel data: kolom turunan disembunyikan secara default, pencarian teks pada kolom berikut
+TABLE_HIDDEN_COLUMNS = ['Tanggal', 'Bulan_Nama', 'Periode_Minggu']
+TABLE_SEARCH_COLUMNS = ['Kab/Kota', 'Komoditas Andil Perubahan Harga', 'Fluktuasi Harga Tertinggi']
+
+ColumnFilter = Tuple[str, str, tuple]
+
+
+# --- Load ---
+
+# Tanpa filter, seluruh store dibaca dari cache kolumnar; dengan filter provinsi/tahun
+# hanya partisi yang cocok yang dibaca
+def load_data(source: str = data_store.DATA_FILE, provinces: Optional[Sequence[str]] = None,
+              years: Optional[Sequence[int]] = None) -> pd.DataFrame:
+    if provinces or years:
+        return data_store.load_partitioned(provinces, years, source=source)
+    return data_store.load_normalized(source)
+
+
+# Tabel panjang dibangun per segmen data oleh data_store, sehingga rilis mingguan baru
+# hanya memparse baris barunya
+def load_commodity_table(source: str = data_store.DATA_FILE, provinces: Optional[Sequence[str]] = None,
+                         years: Optional[Sequence[int]] = None) -> pd.DataFrame:
+    if provinces or years:
+        long_df = data_store.load_partitioned_derived('commodity', parse_commodity_column,
+                                                      provinces=provinces, years=years, source=source)
+    else:
+        long_df = data_store.load_derived('commodity', parse_commodity_column, source=source)
+    return index_commodity_table(long_df)
+
+
+# Cube dibangun per segmen data dan digabung ulang per (kabupaten/kota, minggu).
+# Untuk seleksi provinsi/tahun, cube dibangun langsung dari baris partisi terpilih
+def load_aggregate_cube(source: str = data_store.DATA_FILE, provinces: Optional[Sequence[str]] = None,
+                        years: Optional[Sequence[int]] = None) -> pd.DataFrame:
+    if provinces or years:
+        return build_aggregate_cube(load_data(source, provinces, years))
+    cube = data_store.load_derived('cube', build_aggregate_cube, source=source)
+    return combine_cube(cube, ['Kab/Kota', 'Periode_Minggu']).reset_index()
+
+
+# --- Filter ---
+
+# Baris data/cube untuk kabupaten/kota terpilih (kosong berarti semua)
+def select_districts(frame: pd.DataFrame, districts: Optional[Sequence[str]]) -> pd.DataFrame:
+    if not districts:
+        return frame
+    return frame[frame['Kab/Kota'].isin(districts)]
+
+
+# Label baris untuk seleksi kabupaten/kota; kolom tidak disalin
+def filter_rows(df: pd.DataFrame, districts: Optional[Sequence[str]]) -> pd.Index:
+    if not districts:
+        return df.index
+    return df.index[df['Kab/Kota'].isin(districts)]
+
+
+# --- Komoditas ---
+
+# Parse kolom andil komoditas menjadi tabel panjang (satu baris per komoditas per observasi)
+def parse_commodity_column(df: pd.DataFrame, commodity_column: str = COMMODITY_COLUMN) -> pd.DataFrame:
+    columns = ['row', 'Kab/Kota', 'Tanggal', 'Minggu', 'Komoditas', 'Andil', 'Peringkat']
+    if commodity_column not in df.columns:
+        return pd.DataFrame(columns=columns)
+
+    parsed = df[commodity_column].dropna().astype(str).str.extractall(COMMODITY_PATTERN)
+    parsed.index = parsed.index.set_names(['row', 'match'])
+    parsed = parsed.reset_index()
+
+    # Nama dibersihkan dari sisa pemisah ("," atau ";"), desimal koma diubah ke titik
+    parsed['Komoditas'] = parsed['Komoditas'].str.strip(' ,;')
+    parsed['Andil'] = pd.to_numeric(parsed['Andil'].str.replace(',', '.', regex=False), errors='coerce')
+    parsed['Peringkat'] = (parsed['match'] + 1).astype('int8')
+    parsed = parsed[parsed['Komoditas'] != ''].drop_duplicates(subset=['row', 'Komoditas'], keep='first')
+
+    # Tambahkan atribut baris asal tanpa loop per baris
+    source = df.loc[parsed['row'], ['Kab/Kota', 'Tanggal', 'Minggu']].reset_index(drop=True)
+    long_df = pd.concat([parsed[['row', 'Komoditas', 'Andil', 'Peringkat']].reset_index(drop=True), source], axis=1)
+    long_df['Kab/Kota'] = long_df['Kab/Kota'].astype('category')
+    long_df['Komoditas'] = long_df['Komoditas'].astype('category')
+    return long_df[columns]
+
+
+# Indeks terurut per komoditas agar pencarian cukup dengan .loc
+def index_commodity_table(long_df: pd.DataFrame) -> pd.DataFrame:
+    long_df = long_df.assign(Komoditas=long_df['Komoditas'].astype('category'))
+    return long_df.sort_values(['Komoditas', 'row']).set_index('Komoditas')
+
+
+# Komoditas yang tercatat pada seleksi kabupaten/kota
+def list_commodities(commodity_table: pd.DataFrame, districts: Optional[Sequence[str]] = None) -> List[str]:
+    return select_districts(commodity_table, districts).index.unique().tolist()
+
+
+# Ambil kontribusi satu komoditas untuk baris-baris tertentu (0 jika komoditas tidak tercatat)
+def get_commodity_contribution(commodity_table: pd.DataFrame, commodity: str, rows: Iterable) -> pd.Series:
+    if commodity in commodity_table.index:
+        values = commodity_table.loc[[commodity]].set_index('row')['Andil']
+    else:
+        values = pd.Series(dtype='float64')
+    return values.reindex(rows, fill_value=0).fillna(0)
+
+
+# Kontribusi satu komoditas per observasi pada seleksi kabupaten/kota
+def commodity_contributions(df: pd.DataFrame, commodity_table: pd.DataFrame, commodity: str,
+                            districts: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    source_df = select_districts(df, districts)
+    contributions = source_df[['Kab/Kota', PRICE_CHANGE, 'Bulan_Nama', 'Tahun']].copy()
+    contributions['Kontribusi'] = get_commodity_contribution(commodity_table, commodity, source_df.index).values
+    return contributions
+
+
+# Periode mingguan baris tabel andil (sama dengan Periode_Minggu pada data)
+def commodity_periods(commodity_table: pd.DataFrame) -> pd.Series:
+    return data_store.week_period(commodity_table['Tanggal'], commodity_table['Minggu'])
+
+
+# Postings kolom fluktuasi: satu baris per (baris data, komoditas). Pemisahan nama dilakukan
+# pada daftar kategori (puluhan nilai), lalu dipetakan ke baris lewat kode kategori
+def parse_fluctuation_column(df: pd.DataFrame, fluctuation_column: str = FLUCTUATION_COLUMN) -> pd.DataFrame:
+    values = df[fluctuation_column].astype('category')
+    names = pd.Series(values.cat.categories.astype(str)).str.split(r'[,;]', regex=True).explode().str.strip()
+    names = names[(names != '') & ~names.str.upper().isin(FLUCTUATION_PLACEHOLDERS)]
+    by_code = pd.DataFrame({'code': names.index.to_numpy(), 'Komoditas': names.to_numpy()})
+    rows = pd.DataFrame({'row': df.index.to_numpy(), 'code': values.cat.codes.to_numpy()})
+    return rows.merge(by_code, on='code')[['row', 'Komoditas']]
+
+
+# Indeks terbalik komoditas -> postings (baris data, sumber, andil, peringkat, kabupaten/kota, periode).
+# Postings diurutkan per komoditas dengan offset ala CSR, sehingga postings satu komoditas
+# diambil dengan satu slice tanpa memindai string andil maupun kolom fluktuasi.
+class CommodityIndex:
+    def __init__(self, postings: pd.DataFrame):
+        codes = postings['Komoditas'].cat.codes.to_numpy()
+        order = np.lexsort((postings['row'].to_numpy(), codes))
+        self.postings = postings.iloc[order].reset_index(drop=True)
+        self.names = postings['Komoditas'].cat.categories
+        self.offsets = np.searchsorted(codes[order], np.arange(len(self.names) + 1))
+        # Total per komoditas x kabupaten/kota untuk peringkat cepat atas seleksi mana pun
+        self.totals = _commodity_totals(self.postings)
+
+    def __len__(self) -> int:
+        return len(self.postings)
+
+    @property
+    def commodities(self) -> List[str]:
+        present = np.diff(self.offsets) > 0
+        return self.names[present].tolist()
+
+    # Postings satu komoditas, opsional dibatasi sumber ('Andil'/'Fluktuasi') dan kabupaten/kota
+    def lookup(self, commodity: str, source: Optional[str] = None,
+               districts: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        position = self.names.get_indexer([commodity])[0]
+        if position < 0:
+            return self.postings.iloc[0:0]
+        postings = self.postings.iloc[self.offsets[position]:self.offsets[position + 1]]
+        if source is not None:
+            postings = postings[postings['Sumber'] == source]
+        return select_districts(postings, districts)
+
+    # Komoditas dengan total andil terbesar pada seleksi kabupaten/kota, atas seluruh histori
+    # atau hanya satu minggu (Periode_Minggu) bila period diisi
+    def top_commodities(self, n: Optional[int] = 10, districts: Optional[Sequence[str]] = None,
+                        period: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        totals = self.totals if period is None else _commodity_totals(
+            self.postings[self.postings['Periode_Minggu'] == period])
+        totals = (select_districts(totals, districts)
+                  .drop(columns='Kab/Kota')
+                  .groupby('Komoditas', observed=True).sum())
+        totals.index = totals.index.astype(str)
+        totals = totals[totals['Kemunculan Andil'] > 0].sort_values('Total Andil', ascending=False)
+        return totals if n is None else totals.head(n)
+
+    # Rata-rata andil per periode untuk beberapa komoditas sekaligus (untuk grafik perbandingan)
+    def compare(self, commodities: Sequence[str], districts: Optional[Sequence[str]] = None,
+                resolution: str = 'Bulanan') -> pd.DataFrame:
+        columns = ['Periode', 'Komoditas', 'Rata-rata Andil', 'Total Andil', 'Kemunculan']
+        parts = [self.lookup(commodity, 'Andil', districts) for commodity in commodities]
+        postings = pd.concat(parts) if parts else self.postings.iloc[0:0]
+        if postings.empty:
+            return pd.DataFrame(columns=columns)
+        keys = [get_period_key(postings, resolution).rename('Periode'), postings['Komoditas'].astype(str)]
+        grouped = postings.groupby(keys)['Andil']
+        result = pd.DataFrame({
+            'Rata-rata Andil': grouped.mean(),
+            'Total Andil': grouped.sum(),
+            'Kemunculan': grouped.size(),
+        }).reset_index()
+        return result[columns].sort_values(['Komoditas', 'Periode']).reset_index(drop=True)
+
+
+# Jumlah andil, kemunculan, andil teratas dan fluktuasi tertinggi per komoditas x kabupaten/kota
+def _commodity_totals(postings: pd.DataFrame) -> pd.DataFrame:
+    andil = postings['Sumber'] == 'Andil'
+    return pd.DataFrame({
+        'Komoditas': postings['Komoditas'],
+        'Kab/Kota': postings['Kab/Kota'],
+        'Total Andil': postings['Andil'].where(andil, 0),
+        'Kemunculan Andil': andil.astype('int64'),
+        'Andil Teratas': (andil & (postings['Peringkat'] == 1)).astype('int64'),
+        'Fluktuasi Tertinggi': (~andil).astype('int64'),
+    }).groupby(['Komoditas', 'Kab/Kota'], observed=True).sum().reset_index()
+
+
+# Bangun indeks dari tabel andil (sudah diparse per segmen) dan kolom fluktuasi
+def build_commodity_index(df: pd.DataFrame, commodity_table: pd.DataFrame) -> CommodityIndex:
+    andil = commodity_table.reset_index()
+    andil = pd.DataFrame({
+        'Komoditas': andil['Komoditas'].astype(str),
+        'row': andil['row'].to_numpy(),
+        'Sumber': 'Andil',
+        'Andil': andil['Andil'].to_numpy(dtype='float64'),
+        'Peringkat': andil['Peringkat'].to_numpy(dtype='int8'),
+    })
+    fluctuation = parse_fluctuation_column(df) if FLUCTUATION_COLUMN in df.columns else pd.DataFrame(columns=['row', 'Komoditas'])
+    fluctuation = fluctuation.assign(Sumber='Fluktuasi', Andil=np.nan, Peringkat=np.int8(0))
+    postings = pd.concat([andil, fluctuation[andil.columns]], ignore_index=True)
+    postings['row'] = postings['row'].astype('int64')
+    postings['Peringkat'] = postings['Peringkat'].astype('int8')
+
+    # Atribut baris asal diambil lewat label baris (vektor)
+    source = df.loc[postings['row'], ['Kab/Kota', 'Periode_Minggu']]
+    postings['Kab/Kota'] = source['Kab/Kota'].to_numpy()
+    postings['Kab/Kota'] = postings['Kab/Kota'].astype('category')
+    postings['Periode_Minggu'] = source['Periode_Minggu'].to_numpy()
+    postings['Komoditas'] = postings['Komoditas'].astype('category')
+    postings['Sumber'] = postings['Sumber'].astype('category')
+    return CommodityIndex(postings)
+
+
+# Statistik sel heatmap andil
+MATRIX_STATISTICS = ['Rata-rata Andil', 'Total Andil']
+
+
+# Array padat kabupaten/kota x minggu x komoditas berisi jumlah andil dan banyak observasi,
+# dibangun sekali dari postings andil dengan satu np.bincount. Setiap tampilan heatmap hanya
+# mengiris dan mereduksi array ini, sehingga matriks seluruh histori dan seluruh komoditas
+# tetap menjadi satu tabel kecil tanpa memindai postings lagi.
+class CommodityMatrix:
+    def __init__(self, postings: pd.DataFrame):
+        postings = postings[(postings['Sumber'] == 'Andil') & postings['Andil'].notna()]
+        districts = postings['Kab/Kota'].astype('category').cat.remove_unused_categories()
+        commodities = postings['Komoditas'].astype('category').cat.remove_unused_categories()
+        period_codes, periods = pd.factorize(postings['Periode_Minggu'].to_numpy(), sort=True)
+        self.districts = pd.Index(districts.cat.categories.astype(str))
+        self.periods = pd.DatetimeIndex(periods)
+        self.commodities = pd.Index(commodities.cat.categories.astype(str))
+
+        shape = (len(self.districts), len(self.periods), len(self.commodities))
+        cells = np.ravel_multi_index((districts.cat.codes.to_numpy(), period_codes, commodities.cat.codes.to_numpy()), shape)
+        size = int(np.prod(shape))
+        # float32/int32 agar array tetap kecil pada histori panjang; andil hanya berpresisi 4 desimal
+        self.sums = np.bincount(cells, weights=postings['Andil'].to_numpy(dtype='float64'),
+                                minlength=size).astype('float32').reshape(shape)
+        self.counts = np.bincount(cells, minlength=size).astype('int32').reshape(shape)
+        # Total seluruh histori per kabupaten/kota x komoditas untuk tampilan tanpa pilihan minggu
+        self.history_sums = self.sums.sum(axis=1, dtype='float64')
+        self.history_counts = self.counts.sum(axis=1)
+
+    def _district_positions(self, districts: Optional[Sequence[str]]) -> np.ndarray:
+        if not districts:
+            return np.arange(len(self.districts))
+        positions = self.districts.get_indexer(districts)
+        return np.sort(positions[positions >= 0])
+
+    # Nilai sel dari jumlah dan banyak observasi; sel tanpa observasi menjadi NaN (kosong di heatmap)
+    @staticmethod
+    def _cell_values(sums: np.ndarray, counts: np.ndarray, statistic: str) -> np.ndarray:
+        if statistic == 'Total Andil':
+            values = sums
+        else:
+            values = np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+        return np.where(counts > 0, values, np.nan)
+
+    # Kabupaten/kota x periode untuk satu komoditas. Minggu digabung ke bulan/kuartal dengan
+    # np.add.reduceat karena sumbu periode sudah terurut
+    def by_period(self, commodity: str, districts: Optional[Sequence[str]] = None,
+                  resolution: str = 'Mingguan', statistic: str = 'Rata-rata Andil') -> pd.DataFrame:
+        rows = self._district_positions(districts)
+        position = self.commodities.get_indexer([commodity])[0]
+        if position < 0 or len(rows) == 0 or len(self.periods) == 0:
+            return pd.DataFrame()
+        keys = get_period_key(pd.DataFrame({'Periode_Minggu': self.periods}), resolution).to_numpy()
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        sums = np.add.reduceat(self.sums[rows, :, position], starts, axis=1, dtype='float64')
+        counts = np.add.reduceat(self.counts[rows, :, position], starts, axis=1)
+        matrix = pd.DataFrame(self._cell_values(sums, counts, statistic),
+                              index=self.districts[rows], columns=pd.DatetimeIndex(keys[starts]))
+        return matrix[counts.sum(axis=1) > 0]
+
+    # Kabupaten/kota x komoditas untuk satu minggu (Periode_Minggu) atau seluruh histori bila period
+    # kosong. Komoditas diurutkan menurut total andil seperti CommodityIndex.top_commodities
+    def by_commodity(self, period: Optional[pd.Timestamp] = None, districts: Optional[Sequence[str]] = None,
+                     statistic: str = 'Total Andil', n: Optional[int] = None) -> pd.DataFrame:
+        rows = self._district_positions(districts)
+        if period is None:
+            sums, counts = self.history_sums[rows], self.history_counts[rows]
+        else:
+            position = self.periods.get_indexer([period])[0]
+            if position < 0:
+                return pd.DataFrame()
+            sums, counts = self.sums[rows, position, :].astype('float64'), self.counts[rows, position, :]
+        order = np.argsort(-sums.sum(axis=0), kind='stable')
+        order = order[counts.sum(axis=0)[order] > 0][:n]
+        matrix = pd.DataFrame(self._cell_values(sums[:, order], counts[:, order], statistic),
+                              index=self.districts[rows], columns=self.commodities[order])
+        return matrix[counts[:, order].sum(axis=1) > 0]
+
+
+def build_commodity_matrix(commodity_index: CommodityIndex) -> CommodityMatrix:
+    return CommodityMatrix(commodity_index.postings)
+
+
+# --- Ringkasan dan volatilitas ---
+
+# Cube agregat kabupaten/kota x minggu: count, sum, sum kuadrat, min dan max per metrik.
+# Statistik ini dapat digabung ulang untuk seleksi dan periode apa pun tanpa memindai data mentah.
+def build_aggregate_cube(df: pd.DataFrame) -> pd.DataFrame:
+    keys = ['Kab/Kota', 'Periode_Minggu']
+    values = df[keys].copy()
+    aggregations = {}
+    for metric in CUBE_METRICS:
+        # Data disimpan sebagai float32; akumulasi dilakukan dalam float64
+        values[f'{metric}|value'] = df[metric].astype('float64')
+        values[f'{metric}|sq'] = values[f'{metric}|value'] ** 2
+        aggregations[f'{metric}|count'] = (f'{metric}|value', 'count')
+        aggregations[f'{metric}|sum'] = (f'{metric}|value', 'sum')
+        aggregations[f'{metric}|sumsq'] = (f'{metric}|sq', 'sum')
+        aggregations[f'{metric}|min'] = (f'{metric}|value', 'min')
+        aggregations[f'{metric}|max'] = (f'{metric}|value', 'max')
+    return values.groupby(keys, observed=True).agg(**aggregations).reset_index()
+
+
+# Gabungkan baris cube menurut kunci baru (mis. periode bulanan atau seluruh seleksi)
+def combine_cube(cube: pd.DataFrame, keys) -> pd.DataFrame:
+    aggregations = {f'{metric}|{stat}': how for metric in CUBE_METRICS for stat, how in CUBE_STATS.items()}
+    return cube.groupby(keys, observed=True).agg(aggregations)
+
+
+# Rata-rata dan standar deviasi populasi (sigma pada README) dari statistik cube
+def cube_mean(combined: pd.DataFrame, metric: str) -> pd.Series:
+    count = combined[f'{metric}|count']
+    return (combined[f'{metric}|sum'] / count).where(count > 0)
+
+
+def cube_std(combined: pd.DataFrame, metric: str) -> pd.Series:
+    count = combined[f'{metric}|count']
+    mean = cube_mean(combined, metric)
+    variance = (combined[f'{metric}|sumsq'] / count - mean ** 2).clip(lower=0)
+    return np.sqrt(variance).where(count > 0)
+
+
+# Ringkasan satu metrik untuk seleksi kabupaten/kota: rata-rata, sigma, serta nilai dan daerah ekstrem
+def summarize_cube(cube: pd.DataFrame, metric: str = PRICE_CHANGE) -> Optional[Dict]:
+    per_district = combine_cube(cube, ['Kab/Kota'])
+    per_district = per_district[per_district[f'{metric}|count'] > 0]
+    if per_district.empty:
+        return None
+    total = per_district.sum(numeric_only=True)
+    count = total[f'{metric}|count']
+    mean = total[f'{metric}|sum'] / count
+    return {
+        'count': int(count),
+        'mean': mean,
+        'std': np.sqrt(max(total[f'{metric}|sumsq'] / count - mean ** 2, 0)),
+        'max': per_district[f'{metric}|max'].max(),
+        'max_district': per_district[f'{metric}|max'].idxmax(),
+        'min': per_district[f'{metric}|min'].min(),
+        'min_district': per_district[f'{metric}|min'].idxmin(),
+    }
+
+
+# Volatilitas (sigma) dan rata-rata per kabupaten/kota, terurut dari yang paling volatil
+def volatility_by_district(cube: pd.DataFrame, metric: str = PRICE_CHANGE) -> pd.DataFrame:
+    combined = combine_cube(cube, ['Kab/Kota'])
+    combined = combined[combined[f'{metric}|count'] > 0]
+    result = pd.DataFrame({
+        'Observasi': combined[f'{metric}|count'].astype('int64'),
+        'Rata-rata': cube_mean(combined, metric),
+        'Volatilitas': cube_std(combined, metric),
+    })
+    result.index = result.index.astype(str)
+    return result.sort_values('Volatilitas', ascending=False)
+
+
+# --- Tren ---
+
+# Jendela regresi tren: jumlah minggu terakhir yang dipakai (None berarti seluruh histori)
+TREND_WINDOWS = {
+    'Seluruh periode': None,
+    '52 minggu': 52,
+    '26 minggu': 26,
+    '12 minggu': 12,
+}
+
+# Perkiraan titik pusat (ibu kota) kabupaten/kota untuk peta kemiringan tren
+DISTRICT_COORDINATES = {
+    'SAMBAS': (1.36, 109.30),
+    'BENGKAYANG': (0.82, 109.48),
+    'LANDAK': (0.38, 109.95),
+    'MEMPAWAH': (0.36, 108.96),
+    'SANGGAU': (0.12, 110.59),
+    'KETAPANG': (-1.85, 109.97),
+    'SINTANG': (0.07, 111.50),
+    'KAPUAS HULU': (0.84, 112.93),
+    'SEKADAU': (0.03, 110.95),
+    'MELAWI': (-0.33, 111.74),
+    'KAYONG UTARA': (-1.23, 109.96),
+    'KUBU RAYA': (-0.08, 109.38),
+    'PONTIANAK': (-0.03, 109.33),
+    'SINGKAWANG': (0.91, 108.98),
+}
+
+# Kunci periode per baris sesuai resolusi yang dipilih (vektor, tanpa loop).
+# Berlaku untuk data mentah maupun cube agregat karena keduanya punya Periode_Minggu
+def get_period_key(df: pd.DataFrame, resolution: str) -> pd.Series:
+    freq = TREND_RESOLUTIONS[resolution]
+    if freq is None:
+        return df['Periode_Minggu']
+    return df['Periode_Minggu'].dt.to_period(freq).dt.start_time
+
+
+# Label periode untuk hover, mis. "Minggu 2 Okt 2022", "Okt 2022" atau "Q1 2023"
+def format_period_label(periods: pd.Series, resolution: str) -> pd.Series:
+    if resolution == 'Mingguan':
+        # Hari ke-(7n - 6) adalah minggu n; hari lain hanya muncul untuk minggu 5 yang dibatasi ke akhir bulan
+        days = periods.dt.day - 1
+        week = (days // 7 + 1 + (days % 7 != 0)).astype(str)
+        return 'Minggu ' + week + ' ' + periods.dt.strftime('%b %Y')
+    if resolution == 'Kuartalan':
+        return 'Q' + periods.dt.quarter.astype(str) + ' ' + periods.dt.year.astype(str)
+    return periods.dt.strftime('%b %Y')
+
+
+# Rata-rata perubahan harga per periode (dan per kabupaten/kota bila diminta), dari cube agregat
+def aggregate_trend(cube: pd.DataFrame, resolution: str, by_district: bool = False) -> pd.DataFrame:
+    keys = [get_period_key(cube, resolution).rename('Periode')]
+    if by_district:
+        keys.append(cube['Kab/Kota'])
+    combined = combine_cube(cube, keys)
+    trend = (cube_mean(combined, PRICE_CHANGE)
+               .rename(PRICE_CHANGE)
+               .reset_index()
+               .sort_values('Periode'))
+    if by_district:
+        # Plotly Express mengelompokkan warna per kategori, termasuk kategori yang tidak terpilih
+        trend['Kab/Kota'] = trend['Kab/Kota'].astype(str)
+    trend['Label_Periode'] = format_period_label(trend['Periode'], resolution)
+    trend['Label_Nilai'] = trend[PRICE_CHANGE].map('{:.2f}%'.format)
+    return trend
+
+
+# Hari sejak awal jendela (x pada y = mx + b) dan mask baris dalam jendela N minggu terakhir
+def _window_days(periods: pd.Series, window_weeks: Optional[int]) -> Tuple[np.ndarray, np.ndarray]:
+    if periods.empty:
+        return np.zeros(0), np.zeros(0, dtype=bool)
+    if window_weeks is None:
+        start = periods.min()
+    else:
+        start = periods.max() - pd.Timedelta(weeks=window_weeks) + pd.Timedelta(days=1)
+    mask = (periods >= start).to_numpy()
+    days = (periods - periods[mask].min()).dt.days.to_numpy(dtype='float64')
+    return days, mask
+
+
+# Regresi linier dan sigma per kelompok dari jumlah-jumlah yang sudah diakumulasi
+# (n, Σx, Σy, Σx², Σxy, Σy²); semua kelompok dihitung sekaligus sebagai array
+def _regression_from_sums(names, n, sx, sy, sxx, sxy, syy) -> pd.DataFrame:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        var_x = sxx - sx ** 2 / n
+        var_y = np.clip(syy - sy ** 2 / n, 0, None)
+        cov = sxy - sx * sy / n
+        slope = np.where(var_x > 0, cov / var_x, np.nan)
+        intercept = (sy - slope * sx) / n
+        r2 = np.where((var_x > 0) & (var_y > 0), cov ** 2 / (var_x * var_y), np.nan)
+        sigma = np.sqrt(var_y / n)
+    result = pd.DataFrame({
+        'Observasi': n.astype('int64'),
+        'Kemiringan': slope,
+        'Intersep': intercept,
+        'R²': np.clip(r2, 0, 1),
+        'Volatilitas': sigma,
+    }, index=pd.Index(names, name='Kelompok'))
+    result = result[result['Observasi'] > 0]
+    result['Arah'] = np.select([result['Kemiringan'] > 0, result['Kemiringan'] < 0], ['Naik', 'Turun'], 'Datar')
+    return result.sort_values('Kemiringan', ascending=False, na_position='last')
+
+
+# Tren linier (y = mx + b, x dalam hari sejak awal jendela) dan sigma per kabupaten/kota.
+# Dihitung dari statistik cube, sehingga hasilnya sama dengan regresi atas baris mentah
+def district_trends(cube: pd.DataFrame, metric: str = PRICE_CHANGE, window_weeks: Optional[int] = None) -> pd.DataFrame:
+    valid = cube[cube[f'{metric}|count'] > 0]
+    days, mask = _window_days(valid['Periode_Minggu'], window_weeks)
+    valid, x = valid[mask], days[mask]
+    codes, names = pd.factorize(valid['Kab/Kota'].astype(str), sort=True)
+    count = valid[f'{metric}|count'].to_numpy(dtype='float64')
+    total = valid[f'{metric}|sum'].to_numpy(dtype='float64')
+
+    def group_sum(weights):
+        return np.bincount(codes, weights=weights, minlength=len(names))
+
+    result = _regression_from_sums(
+        names, group_sum(count), group_sum(count * x), group_sum(total),
+        group_sum(count * x ** 2), group_sum(total * x),
+        group_sum(valid[f'{metric}|sumsq'].to_numpy(dtype='float64')),
+    )
+    return result.rename_axis('Kab/Kota')
+
+
+# Tren andil per komoditas atas seluruh observasi andilnya. districts hanya membatasi baris;
+# observasi kabupaten/kota terpilih digabung dalam satu regresi per komoditas
+def commodity_trends(commodity_table: pd.DataFrame, window_weeks: Optional[int] = None,
+                     districts: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    table = select_districts(commodity_table, districts)
+    table = table[table['Andil'].notna()]
+    periods = commodity_periods(table)
+    days, mask = _window_days(periods.reset_index(drop=True), window_weeks)
+    x = days[mask]
+    y = table['Andil'].to_numpy(dtype='float64')[mask]
+    codes, names = pd.factorize(table.index.astype(str)[mask], sort=True)
+
+    def group_sum(weights=None):
+        return np.bincount(codes, weights=weights, minlength=len(names))
+
+    result = _regression_from_sums(
+        names, group_sum(), group_sum(x), group_sum(y), group_sum(x ** 2), group_sum(x * y), group_sum(y ** 2),
+    )
+    return result.rename_axis('Komoditas')
+
+
+# --- Rolling ---
+
+# Jendela sinyal halus (jumlah minggu berdata per kabupaten/kota)
+ROLLING_WINDOWS = (4, 12)
+
+
+# Deret mingguan per kabupaten/kota (rata-rata minggu tersebut), terurut per daerah lalu periode
+def weekly_series(cube: pd.DataFrame, metric: str = PRICE_CHANGE) -> pd.DataFrame:
+    valid = cube[cube[f'{metric}|count'] > 0]
+    series = pd.DataFrame({
+        'Kab/Kota': valid['Kab/Kota'].astype(str),
+        'Periode_Minggu': valid['Periode_Minggu'],
+        'Nilai': cube_mean(valid, metric),
+    })
+    return series.sort_values(['Kab/Kota', 'Periode_Minggu']).reset_index(drop=True)
+
+
+def _ungroup(result: pd.Series) -> pd.Series:
+    return result.reset_index(level=0, drop=True)
+
+
+# Rolling mean/std/min/max dan EWMA per kabupaten/kota dengan operasi grouped rolling pandas.
+# ewm_seed (opsional) berisi nilai EWMA terakhir per daerah untuk melanjutkan deret sebelumnya
+def _rolling_frame(series: pd.DataFrame, windows: Sequence[int], ewm_seed: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    result = series.copy()
+    values = series.groupby('Kab/Kota', sort=False)['Nilai']
+    for window in windows:
+        rolling = values.rolling(window, min_periods=1)
+        result[f'Rata-rata {window}m'] = _ungroup(rolling.mean())
+        result[f'Std {window}m'] = _ungroup(rolling.std(ddof=0))
+        result[f'Min {window}m'] = _ungroup(rolling.min())
+        result[f'Max {window}m'] = _ungroup(rolling.max())
+        result[f'EWMA {window}m'] = _seeded_ewm(series, window, None if ewm_seed is None else ewm_seed[f'EWMA {window}m'])
+    return result
+
+
+# EWMA rekursif (adjust=False): s_t = a * x_t + (1 - a) * s_(t-1). Nilai terakhir deret lama
+# disisipkan sebagai observasi pertama sehingga rekursi berlanjut tanpa menghitung ulang histori
+def _seeded_ewm(series: pd.DataFrame, window: int, seed: Optional[pd.Series]) -> pd.Series:
+    if seed is None or seed.empty:
+        return _ungroup(series.groupby('Kab/Kota', sort=False)['Nilai'].ewm(span=window, adjust=False).mean())
+    seed_rows = pd.DataFrame({'Kab/Kota': seed.index, 'Nilai': seed.to_numpy(), 'seed': True})
+    combined = pd.concat([seed_rows, series[['Kab/Kota', 'Nilai']].assign(seed=False)])
+    combined = combined.reset_index().sort_values(['Kab/Kota', 'seed'], ascending=[True, False], kind='stable')
+    ewm = _ungroup(combined.groupby('Kab/Kota', sort=False)['Nilai'].ewm(span=window, adjust=False).mean())
+    ewm = ewm[~combined['seed']]
+    return pd.Series(ewm.to_numpy(), index=combined.loc[~combined['seed'], 'index'].to_numpy()).reindex(series.index)
+
+
+# Checksum baris cube sampai periode `until` (inklusif), tidak bergantung pada urutan baris.
+# Disimpan di attrs hasil inkremental sehingga pemanggilan berikutnya dapat membuktikan bahwa
+# histori lama tidak berubah (termasuk revisi nilai dengan jumlah baris yang sama)
+HISTORY_CHECKSUM = 'history_checksum'
+
+
+def _history_checksum(cube: pd.DataFrame, until) -> int:
+    old = cube[cube['Periode_Minggu'] <= until]
+    hashes = pd.util.hash_pandas_object(old[sorted(old.columns)], index=False).to_numpy()
+    return int(hashes.sum(dtype='uint64'))
+
+
+def _with_checksum(result: pd.DataFrame, cube: pd.DataFrame, until) -> pd.DataFrame:
+    result.attrs[HISTORY_CHECKSUM] = _history_checksum(cube, until)
+    return result
+
+
+# previous hanya boleh dilanjutkan bila histori yang dipakainya identik dengan histori pada cube baru
+def _history_unchanged(cube: pd.DataFrame, previous: Optional[pd.DataFrame], until) -> bool:
+    if previous is None or previous.empty or HISTORY_CHECKSUM not in previous.attrs:
+        return False
+    return previous.attrs[HISTORY_CHECKSUM] == _history_checksum(cube, until)
+
+
+# Sinyal rolling per kabupaten/kota. Dengan previous (hasil untuk versi data sebelumnya),
+# hanya minggu baru yang dihitung: cukup (jendela terpanjang - 1) minggu terakhir per daerah
+# sebagai konteks dan nilai EWMA terakhir sebagai awal rekursi. Bila histori lama ikut berubah
+# (mis. rilis susulan untuk minggu lampau atau data.csv dikoreksi), seluruh deret dihitung ulang.
+def rolling_statistics(cube: pd.DataFrame, metric: str = PRICE_CHANGE, windows: Sequence[int] = ROLLING_WINDOWS,
+                       previous: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    series = weekly_series(cube, metric)
+    last_period = None if previous is None or previous.empty else previous['Periode_Minggu'].max()
+    if not _history_unchanged(cube, previous, last_period):
+        return _with_checksum(_rolling_frame(series, windows), cube, series['Periode_Minggu'].max())
+
+    is_new = (series['Periode_Minggu'] > last_period).to_numpy()
+    if not is_new.any():
+        return previous
+
+    history = previous.groupby('Kab/Kota', sort=False).tail(max(windows) - 1)
+    context = pd.concat([history[['Kab/Kota', 'Periode_Minggu', 'Nilai']], series[is_new]])
+    context = context.sort_values(['Kab/Kota', 'Periode_Minggu']).reset_index(drop=True)
+    context_new = (context['Periode_Minggu'] > last_period).to_numpy()
+
+    # Rolling dihitung atas konteks; EWMA hanya atas minggu baru dengan nilai awal dari hasil lama
+    updated = _rolling_frame(context, windows)[context_new]
+    ewm_seed = previous.groupby('Kab/Kota', sort=False).tail(1).set_index('Kab/Kota')
+    for window in windows:
+        updated[f'EWMA {window}m'] = _seeded_ewm(context[context_new], window, ewm_seed[f'EWMA {window}m'])
+    result = pd.concat([previous, updated], ignore_index=True)
+    result = result.sort_values(['Kab/Kota', 'Periode_Minggu']).reset_index(drop=True)
+    return _with_checksum(result, cube, series['Periode_Minggu'].max())
+
+
+# Indeks disparitas provinsi per minggu: rata-rata disparitas antar daerah (dari cube),
+# serta sebaran dan rentang perubahan harga antar kabupaten/kota pada minggu yang sama.
+# Dengan previous, hanya periode setelah periode terakhir previous yang dihitung
+# (kecuali baris cube pada periode lama berubah, lihat _history_unchanged)
+def provincial_disparity(cube: pd.DataFrame, windows: Sequence[int] = ROLLING_WINDOWS,
+                         previous: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    last_period = None if previous is None or previous.empty else previous['Periode'].max()
+    if _history_unchanged(cube, previous, last_period):
+        is_new = (cube['Periode_Minggu'] > last_period).to_numpy()
+        if not is_new.any():
+            return previous
+        per_period = pd.concat([previous[DISPARITY_COLUMNS], _disparity_per_period(cube[is_new])], ignore_index=True)
+    else:
+        per_period = _disparity_per_period(cube)
+
+    # Rolling atas deret provinsi (satu baris per minggu) murah; tetap dihitung di sini agar
+    # jendela di perbatasan lama/baru benar
+    for window in windows:
+        per_period[f'Indeks Disparitas {window}m'] = per_period['Indeks Disparitas'].rolling(window, min_periods=1).mean()
+    return _with_checksum(per_period, cube, per_period['Periode'].max())
+
+
+DISPARITY_COLUMNS = ['Periode', 'Observasi', 'Kabupaten/Kota', 'Indeks Disparitas',
+                     'Sebaran Perubahan Harga', 'Rentang Perubahan Harga']
+
+
+def _disparity_per_period(cube: pd.DataFrame) -> pd.DataFrame:
+    combined = combine_cube(cube, ['Periode_Minggu'])
+    district_change = weekly_series(cube, PRICE_CHANGE).groupby('Periode_Minggu')['Nilai']
+    result = pd.DataFrame({
+        'Observasi': combined[f'{PRICE_CHANGE}|count'] + combined[f'{DISPARITY}|count'],
+        'Kabupaten/Kota': district_change.size(),
+        'Indeks Disparitas': cube_mean(combined, DISPARITY),
+        'Sebaran Perubahan Harga': district_change.std(ddof=0),
+        'Rentang Perubahan Harga': district_change.max() - district_change.min(),
+    })
+    result = result.rename_axis('Periode').reset_index()
+    result['Kabupaten/Kota'] = result['Kabupaten/Kota'].fillna(0).astype('int64')
+    return result[DISPARITY_COLUMNS].sort_values('Periode').reset_index(drop=True)
+
+
+# --- Perbandingan antar daerah ---
+
+# Satu nilai per kabupaten/kota dari cube agregat, sehingga ukuran grafik tidak bergantung pada panjang histori
+def reduce_by_district(cube: pd.DataFrame, metric: str, statistic: str) -> pd.DataFrame:
+    valid = cube[cube[f'{metric}|count'] > 0]
+    if statistic == 'Terbaru':
+        latest = valid.sort_values('Periode_Minggu').groupby('Kab/Kota', observed=True).tail(1)
+        reduced = pd.DataFrame({
+            'Kab/Kota': latest['Kab/Kota'].astype(str),
+            metric: cube_mean(latest, metric),
+            'Keterangan': format_period_label(latest['Periode_Minggu'], 'Mingguan'),
+        })
+    else:
+        combined = combine_cube(valid, ['Kab/Kota'])
+        values = cube_mean(combined, metric) if statistic == 'Rata-rata' else combined[f'{metric}|max']
+        reduced = pd.DataFrame({
+            'Kab/Kota': combined.index.astype(str),
+            metric: values.values,
+            'Keterangan': combined[f'{metric}|count'].map('{} observasi'.format).values,
+        })
+    return reduced.reset_index(drop=True)
+
+
+# Kuartil dan pagar whisker (1.5 IQR) per kabupaten/kota
+def district_quantiles(df: pd.DataFrame, metric: str) -> pd.DataFrame:
+    quantiles = (df.groupby('Kab/Kota', observed=True)[metric]
+                   .quantile([0, 0.25, 0.5, 0.75, 1])
+                   .unstack())
+    quantiles.columns = ['min', 'q1', 'median', 'q3', 'max']
+    iqr = quantiles['q3'] - quantiles['q1']
+    quantiles['lowerfence'] = np.maximum(quantiles['min'], quantiles['q1'] - 1.5 * iqr)
+    quantiles['upperfence'] = np.minimum(quantiles['max'], quantiles['q3'] + 1.5 * iqr)
+    quantiles = quantiles.dropna(subset=['median']).reset_index()
+    quantiles['Kab/Kota'] = quantiles['Kab/Kota'].astype(str)
+    return quantiles
+
+
+# --- Tabel data ---
+
+# Mask pencarian teks (tanpa membedakan huruf besar/kecil) atas beberapa kolom sekaligus.
+# Kolom kategori dicocokkan pada daftar kategorinya saja, bukan per baris
+def search_mask(frame: pd.DataFrame, text: str) -> np.ndarray:
+    mask = np.zeros(len(frame), dtype=bool)
+    for col in TABLE_SEARCH_COLUMNS:
+        if col not in frame.columns:
+            continue
+        values = frame[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            categories = values.cat.categories
+            matched = categories[categories.astype(str).str.contains(text, case=False, regex=False)]
+            mask |= values.isin(matched).to_numpy()
+        else:
+            mask |= values.astype('string').str.contains(text, case=False, regex=False).fillna(False).to_numpy(dtype=bool)
+    return mask
+
+
+# Urutan baris tabel setelah pencarian, filter kolom dan pengurutan.
+# column_filter berupa (kolom, 'in', nilai) atau (kolom, 'range', (bawah, atas)).
+# Hanya label baris yang dikembalikan; isi halaman diambil belakangan
+def query_table(frame: pd.DataFrame, search: str = '', column_filter: Optional[ColumnFilter] = None,
+                sort_column: Optional[str] = None, ascending: bool = True) -> np.ndarray:
+    mask = np.ones(len(frame), dtype=bool)
+    if search:
+        mask &= search_mask(frame, search)
+    if column_filter is not None:
+        col, kind, value = column_filter
+        if kind == 'range':
+            mask &= frame[col].between(*value).to_numpy()
+        else:
+            mask &= frame[col].astype(str).isin(value).to_numpy()
+    selected = frame.index[mask]
+    if sort_column is None:
+        return selected.to_numpy()
+    order = frame.loc[selected, sort_column].sort_values(ascending=ascending, kind='stable', na_position='last')
+    return order.index.to_numpy()
+
+
+# --- Keluaran untuk klien lain (API, snapshot) ---
+
+# Metrik disimpan sebagai float32 (~7 digit signifikan); digit setelahnya hanya derau pelebaran
+# ke float64, mis. 14.07 menjadi 14.069999694824219
+OUTPUT_SIGNIFICANT_DIGITS = 7
+
+
+# Bulatkan ke n digit signifikan secara vektor. Pembagian bilangan bulat hasil pembulatan dengan
+# pangkat 10 menghasilkan double terdekat ke nilai desimalnya, sehingga JSON menulis "14.07"
+def round_significant(values, digits: int = OUTPUT_SIGNIFICANT_DIGITS) -> np.ndarray:
+    values = np.asarray(values, dtype='float64')
+    magnitude = np.floor(np.log10(np.abs(values), out=np.zeros_like(values), where=np.isfinite(values) & (values != 0)))
+    decimals = digits - 1 - magnitude
+    scale = 10.0 ** np.abs(decimals)
+    return np.where(decimals >= 0, np.round(values * scale) / scale, np.round(values / scale) * scale)
+
+
+# Salinan frame dengan semua kolom float dibulatkan (lihat round_significant)
+def round_output(frame: pd.DataFrame) -> pd.DataFrame:
+    return frame.assign(**{
+        col: round_significant(frame[col]) for col in frame.columns if pd.api.types.is_float_dtype(frame[col])
+    })
+
+
+# Nilai skalar sebagai tipe Python bawaan untuk JSON; float dibulatkan seperti round_output
+def output_value(value):
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float):
+        return round_significant(value).item()
+    return value
@@ -0,0 +1,321 @@
+"""API HTTP JSON lokal di atas cache data, untuk alat internal lain.
+
+Menyajikan angka yang sama dengan dashboard tanpa biaya rerun Streamlit:
+
+    GET /api/meta                                versi data, daftar kabupaten/kota, minggu dan komoditas
+    GET /api/summary?district=&period=           ringkasan (seluruh histori atau satu minggu YYYY-MM-DD)
+    GET /api/rankings?metric=&statistic=&order=  peringkat kabupaten/kota (price_change atau disparity)
+    GET /api/commodities?district=&period=       komoditas terurut menurut total andil
+    GET /api/commodities/<nama>/andil?resolution=  deret andil satu komoditas
+    GET /api/disparities                         indeks disparitas provinsi per minggu
+    GET /metrics                                 metrik Prometheus (lihat metrics.py)
+
+``district`` boleh diulang untuk beberapa kabupaten/kota. Endpoint berbentuk daftar
+memakai ``page`` dan ``per_page``. Setiap respons membawa ETag yang diturunkan dari
+versi data dan query, sehingga klien dengan ``If-None-Match`` mendapat 304 tanpa
+perhitungan ulang; respons yang sudah dihitung juga disimpan di cache LRU sampai
+versi data berubah. Perhitungan berjalan di thread pool agar event loop tetap responsif.
+
+    python api.py --port 8600
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+
+import pandas as pd
+import tornado.web
+
+import analytics
+import data_store
+import metrics
+
+logger = logging.getLogger('dashboard.api')
+
+DEFAULT_PORT = 8600
+RESPONSE_CACHE_ENTRIES = 1024
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+METRICS = {'price_change': analytics.PRICE_CHANGE, 'disparity': analytics.DISPARITY}
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+# Tabel yang dibutuhkan API untuk satu versi data
+class DataSnapshot:
+    def __init__(self, version, source, previous=None):
+        self.version = version
+        self.cube = analytics.load_aggregate_cube(source)
+        self.index = analytics.build_commodity_index(analytics.load_data(source), analytics.load_commodity_table(source))
+        # Indeks disparitas dilanjutkan dari versi sebelumnya, hanya minggu baru yang dihitung
+        self.disparity = analytics.provincial_disparity(
+            self.cube, previous=None if previous is None else previous.disparity)
+        self.districts = sorted(self.cube['Kab/Kota'].astype(str).unique())
+        self.periods = pd.DatetimeIndex(self.cube['Periode_Minggu'].unique()).sort_values()
+
+
+# Snapshot data terkini dan cache respons; dimuat ulang bila versi data berubah
+class DataCache:
+    def __init__(self, source=data_store.DATA_FILE, max_entries=RESPONSE_CACHE_ENTRIES):
+        self.source = source
+        self.max_entries = max_entries
+        self.responses = OrderedDict()
+        self._snapshot = None
+        self._lock = asyncio.Lock()
+
+    async def current(self):
+        version = data_store.data_version(self.source)
+        if self._snapshot is None or self._snapshot.version != version:
+            async with self._lock:
+                if self._snapshot is None or self._snapshot.version != version:
+                    loop = asyncio.get_running_loop()
+                    self._snapshot = await loop.run_in_executor(None, DataSnapshot, version, self.source, self._snapshot)
+                    self.responses.clear()
+        return self._snapshot
+
+    def get(self, key):
+        body = self.responses.get(key)
+        if body is not None:
+            self.responses.move_to_end(key)
+        return body
+
+    def put(self, key, body):
+        self.responses[key] = body
+        if len(self.responses) > self.max_entries:
+            self.responses.popitem(last=False)
+
+
+# Baris tabel sebagai list of dict JSON; tanggal ditulis YYYY-MM-DD, float dibulatkan ke presisi
+# float32 penyimpanannya (tanpa derau pelebaran) dan NaN menjadi null
+def _records(frame):
+    frame = analytics.round_output(frame)
+    frame = frame.assign(**{
+        col: frame[col].dt.strftime('%Y-%m-%d')
+        for col in frame.columns if pd.api.types.is_datetime64_any_dtype(frame[col])
+    })
+    return json.loads(frame.to_json(orient='records', force_ascii=False))
+
+
+class ApiHandler(tornado.web.RequestHandler):
+    name = None
+
+    # ETag dihitung sendiri dari versi data, bukan dari isi respons
+    def compute_etag(self):
+        return None
+
+    def write_error(self, status_code, **kwargs):
+        self.finish({'error': self._reason})
+
+    # Query dinormalisasi (urutan argumen diabaikan) sebagai kunci cache dan ETag
+    def _query_key(self):
+        arguments = sorted((key, sorted(value.decode() for value in values))
+                           for key, values in self.request.query_arguments.items())
+        return json.dumps([self.request.path, arguments], ensure_ascii=False)
+
+    async def get(self, *args):
+        cache = self.application.settings['data_cache']
+        snapshot = await cache.current()
+        key = self._query_key()
+        self.set_header('Etag', f'"{snapshot.version}-{hashlib.sha1(key.encode()).hexdigest()[:16]}"')
+        self.set_header('Cache-Control', 'no-cache')
+        if self.check_etag_header():
+            self.set_status(304)
+            return
+
+        body = cache.get((snapshot.version, key))
+        if body is None:
+            arguments = {name: self.get_arguments(name) for name in self.request.query_arguments}
+            loop = asyncio.get_running_loop()
+            try:
+                payload = await loop.run_in_executor(None, self._run, snapshot, args, arguments)
+            except ApiError as e:
+                self.clear_header('Etag')
+                self.set_status(e.status)
+                self.finish({'error': e.message})
+                return
+            body = json.dumps({'data_version': snapshot.version, **payload}, ensure_ascii=False)
+            cache.put((snapshot.version, key), body)
+        self.set_header('Content-Type', 'application/json; charset=utf-8')
+        self.write(body)
+
+    def _run(self, snapshot, args, arguments):
+        with metrics.Recorder().measure(f'API {self.name}'):
+            return self.query(snapshot, *args, **arguments)
+
+    def query(self, snapshot, *args, **arguments):
+        raise NotImplementedError
+
+
+# --- Parameter query ---
+
+def _single(arguments, name, default=None, choices=None):
+    values = arguments.get(name) or [default]
+    value = values[-1]
+    if choices is not None and value not in choices:
+        raise ApiError(400, f"{name} harus salah satu dari: {', '.join(choices)}")
+    return value
+
+
+def _districts(snapshot, arguments):
+    districts = arguments.get('district', [])
+    unknown = sorted(set(districts) - set(snapshot.districts))
+    if unknown:
+        raise ApiError(400, f"Kabupaten/kota tidak dikenal: {', '.join(unknown)}")
+    return districts or None
+
+
+def _period(snapshot, arguments):
+    value = _single(arguments, 'period')
+    if value is None:
+        return None
+    try:
+        period = pd.Timestamp(value)
+    except ValueError:
+        raise ApiError(400, "period harus berformat YYYY-MM-DD")
+    if period not in snapshot.periods:
+        raise ApiError(404, f"Tidak ada data untuk minggu {value}")
+    return period
+
+
+def _int(arguments, name, default, low, high):
+    value = _single(arguments, name, str(default))
+    try:
+        number = int(value)
+    except ValueError:
+        raise ApiError(400, f"{name} harus bilangan bulat")
+    if not low <= number <= high:
+        raise ApiError(400, f"{name} harus antara {low} dan {high}")
+    return number
+
+
+def paginate(frame, arguments):
+    per_page = _int(arguments, 'per_page', DEFAULT_PAGE_SIZE, 1, MAX_PAGE_SIZE)
+    pages = max(1, -(-len(frame) // per_page))
+    page = _int(arguments, 'page', 1, 1, pages)
+    start = (page - 1) * per_page
+    return {
+        'data': _records(frame.iloc[start:start + per_page]),
+        'pagination': {'page': page, 'per_page': per_page, 'pages': pages, 'total': len(frame)},
+    }
+
+
+# --- Endpoint ---
+
+class MetaHandler(ApiHandler):
+    name = 'meta'
+
+    def query(self, snapshot, **arguments):
+        return {'data': {
+            'districts': snapshot.districts,
+            'periods': {
+                'first': snapshot.periods[0].strftime('%Y-%m-%d') if len(snapshot.periods) else None,
+                'latest': snapshot.periods[-1].strftime('%Y-%m-%d') if len(snapshot.periods) else None,
+                'count': len(snapshot.periods),
+            },
+            'commodities': snapshot.index.commodities,
+            'metrics': list(METRICS),
+            'statistics': analytics.DISTRICT_STATISTICS,
+            'resolutions': list(analytics.TREND_RESOLUTIONS),
+        }}
+
+
+class SummaryHandler(ApiHandler):
+    name = 'summary'
+
+    def query(self, snapshot, **arguments):
+        cube = analytics.select_districts(snapshot.cube, _districts(snapshot, arguments))
+        period = _period(snapshot, arguments)
+        if period is not None:
+            cube = cube[cube['Periode_Minggu'] == period]
+        summary = analytics.summarize_cube(cube)
+        if summary is not None:
+            summary = {key: analytics.output_value(value) for key, value in summary.items()}
+        return {'data': summary}
+
+
+class RankingsHandler(ApiHandler):
+    name = 'rankings'
+
+    def query(self, snapshot, **arguments):
+        metric = METRICS[_single(arguments, 'metric', 'price_change', METRICS)]
+        statistic = _single(arguments, 'statistic', 'Terbaru', analytics.DISTRICT_STATISTICS)
+        ascending = _single(arguments, 'order', 'desc', ['asc', 'desc']) == 'asc'
+        cube = analytics.select_districts(snapshot.cube, _districts(snapshot, arguments))
+        ranking = (analytics.reduce_by_district(cube, metric, statistic)
+                   .sort_values(metric, ascending=ascending, kind='stable')
+                   .reset_index(drop=True))
+        ranking.insert(0, 'Peringkat', range(1, len(ranking) + 1))
+        return paginate(ranking, arguments)
+
+
+class CommoditiesHandler(ApiHandler):
+    name = 'commodities'
+
+    def query(self, snapshot, **arguments):
+        top = snapshot.index.top_commodities(None, _districts(snapshot, arguments), period=_period(snapshot, arguments))
+        return paginate(top.reset_index(), arguments)
+
+
+class CommodityAndilHandler(ApiHandler):
+    name = 'commodity_andil'
+
+    def query(self, snapshot, commodity, **arguments):
+        if commodity not in snapshot.index.commodities:
+            raise ApiError(404, f"Komoditas tidak dikenal: {commodity}")
+        resolution = _single(arguments, 'resolution', 'Mingguan', analytics.TREND_RESOLUTIONS)
+        series = snapshot.index.compare([commodity], _districts(snapshot, arguments), resolution)
+        return paginate(series.drop(columns='Komoditas'), arguments)
+
+
+class DisparitiesHandler(ApiHandler):
+    name = 'disparities'
+
+    def query(self, snapshot, **arguments):
+        return paginate(snapshot.disparity, arguments)
+
+
+class MetricsHandler(tornado.web.RequestHandler):
+    def get(self):
+        self.set_header('Content-Type', 'text/plain; version=0.0.4')
+        self.write(metrics.REGISTRY.prometheus_text())
+
+
+def make_app(source=data_store.DATA_FILE):
+    return tornado.web.Application([
+        (r'/api/meta', MetaHandler),
+        (r'/api/summary', SummaryHandler),
+        (r'/api/rankings', RankingsHandler),
+        (r'/api/commodities', CommoditiesHandler),
+        (r'/api/commodities/([^/]+)/andil', CommodityAndilHandler),
+        (r'/api/disparities', DisparitiesHandler),
+        (r'/metrics', MetricsHandler),
+    ], data_cache=DataCache(source))
+
+
+async def serve(host, port, source):
+    pd.set_option('mode.copy_on_write', True)
+    app = make_app(source)
+    app.listen(port, address=host)
+    logger.info("API berjalan di http://%s:%d/api/meta", host, port)
+    await asyncio.Event().wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="API HTTP JSON lokal untuk data harga.")
+    parser.add_argument('--source', default=data_store.DATA_FILE)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(serve(args.host, args.port, args.source))
+
+
+if __name__ == '__main__':
+    main()
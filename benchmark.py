@@ -0,0 +1,206 @@
+"""Benchmark pipeline dashboard pada data sintetis yang diperbesar dari data.csv.
+
+Dataset sintetis memakai skema yang sama dengan data.csv. Nilai teks dan angka
+(termasuk string andil komoditas dan placeholder "-") diambil acak dari data
+asli, sedangkan jumlah kabupaten/kota dan minggu diperbesar sesuai jumlah baris.
+Setiap tahap pipeline diukur terpisah dan hasilnya ditulis sebagai JSON agar
+dapat dibandingkan antar versi:
+
+    python benchmark.py --rows 10000 100000 1000000 10000000 --output bench.json
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+import analytics
+import data_store
+
+DEFAULT_ROWS = [10_000, 100_000, 1_000_000, 10_000_000]
+# Panjang histori sintetis minimum (minggu); kabupaten/kota ditambah bila baris melebihi 14 x WEEKS.
+# Bila kode wilayah habis, histori diperpanjang
+WEEKS = 520
+WEEKS_PER_MONTH = 4
+START_YEAR = 2015
+CHUNK_ROWS = 1_000_000
+# Kode wilayah sintetis bergaya BPS: 2 digit provinsi + 2 digit kabupaten/kota, sehingga tetap
+# dalam rentang kunci No yang diterima validation (1-9999)
+PROVINCE_CODES = range(11, 100)
+DISTRICT_CODES = range(1, 100)
+# Kolom yang nilainya diambil acak dari data asli, dalam bentuk teks mentah
+SAMPLED_COLUMNS = ['Indikator Perubahan Harga (%)', 'Komoditas Andil Perubahan Harga ',
+                   'Fluktuasi Harga Tertinggi', 'Nilai', 'Disparitas Harga Antar Daerah']
+
+
+def _real_districts(template):
+    return template[['Provinsi', 'Kab/Kota', 'No']].drop_duplicates('Kab/Kota')
+
+
+# Kode wilayah sintetis yang tidak bentrok dengan kode daerah asli
+def _synthetic_codes(template):
+    codes = np.array([province * 100 + district for province in PROVINCE_CODES for district in DISTRICT_CODES])
+    return codes[~np.isin(codes, _real_districts(template)['No'].to_numpy())]
+
+
+# Daftar kabupaten/kota (provinsi, nama dan kode wilayah): daerah asli lalu daerah sintetis.
+# Daerah sintetis di luar kode provinsi asli masuk ke provinsi sintetis sesuai 2 digit awal kodenya
+def _districts(template, count):
+    real = _real_districts(template).iloc[:count]
+    extra = _synthetic_codes(template)[:count - len(real)]
+    real_provinces = dict(zip(real['No'] // 100, real['Provinsi']))
+    provinces = real['Provinsi'].tolist() + [real_provinces.get(code // 100, f'PROVINSI SINTETIS {code // 100}')
+                                             for code in extra]
+    names = real['Kab/Kota'].tolist() + [f'KABUPATEN SINTETIS {code}' for code in extra]
+    codes = real['No'].tolist() + extra.tolist()
+    return np.array(provinces, dtype=object), np.array(names, dtype=object), np.array(codes, dtype='int64')
+
+
+# Tulis dataset sintetis n baris ke path, per potongan agar memori tetap terbatas
+def generate_dataset(n_rows, path, template_path=data_store.DATA_FILE, seed=0):
+    template = pd.read_csv(template_path, dtype=str)
+    template['No'] = template['No'].astype('int64')
+    max_districts = template['Kab/Kota'].nunique() + len(_synthetic_codes(template))
+    district_count = min(max_districts, max(template['Kab/Kota'].nunique(), math.ceil(n_rows / WEEKS)))
+    provinces, names, codes = _districts(template, district_count)
+    rng = np.random.default_rng(seed)
+
+    for start in range(0, n_rows, CHUNK_ROWS):
+        row = np.arange(start, min(start + CHUNK_ROWS, n_rows))
+        # Urutan baris seperti rilis BPS: per minggu, lalu per kabupaten/kota
+        week, district = np.divmod(row, district_count)
+        month = week // WEEKS_PER_MONTH
+        chunk = pd.DataFrame({
+            'Tahun': START_YEAR + month // 12,
+            'Bulan': month % 12 + 1,
+            'Minggu': week % WEEKS_PER_MONTH + 1,
+            'No': codes[district],
+            'Provinsi': provinces[district],
+            'Kab/Kota': names[district],
+        })
+        for col in SAMPLED_COLUMNS:
+            values = template[col].to_numpy()
+            chunk[col] = values[rng.integers(0, len(values), len(row))]
+        chunk[template.columns].to_csv(path, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+    return district_count
+
+
+# Figure setara dengan grafik batang per kabupaten/kota dan grafik tren di dashboard
+def build_figures(cube, trend):
+    bars = analytics.reduce_by_district(cube, analytics.PRICE_CHANGE, 'Terbaru')
+    bar_fig = go.Figure(go.Bar(x=bars['Kab/Kota'], y=bars[analytics.PRICE_CHANGE],
+                               customdata=bars[['Keterangan']]))
+    line_fig = px.line(trend, x='Periode', y=analytics.PRICE_CHANGE, markers=True,
+                       custom_data=['Label_Periode'])
+    return [bar_fig, line_fig]
+
+
+class StageTimer:
+    def __init__(self):
+        self.stages = {}
+
+    def run(self, name, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.stages[name] = round(time.perf_counter() - start, 6)
+        return result
+
+
+def run_benchmark(n_rows, work_dir, seed=0):
+    source = os.path.join(work_dir, f'synthetic_{n_rows}.csv')
+    cache_dir = os.path.join(work_dir, 'cache')
+    incoming_dir = os.path.join(work_dir, 'incoming')
+    timer = StageTimer()
+
+    district_count = timer.run('generate', generate_dataset, n_rows, source, seed=seed)
+    # Cold start: parse CSV, normalisasi dan tulis cache; lalu baca ulang dari cache
+    timer.run('load', data_store.load_normalized, source, cache_dir, incoming_dir=incoming_dir)
+    df = timer.run('load_cached', data_store.load_normalized, source, cache_dir, incoming_dir=incoming_dir)
+    # Validasi tidak boleh menolak baris sintetis; bila ada, semua waktu tahap diukur pada dataset yang salah
+    if len(df) != n_rows:
+        raise RuntimeError(f"Dataset sintetis {n_rows} baris hanya dimuat {len(df)} baris")
+
+    # Seleksi separuh kabupaten/kota, seperti filter sidebar
+    districts = df['Kab/Kota'].cat.categories[:max(1, district_count // 2)].tolist()
+    rows = timer.run('filter', lambda: df.loc[analytics.filter_rows(df, districts)])
+    cube = timer.run('aggregate_cube', analytics.build_aggregate_cube, df)
+    summary = timer.run('summary', analytics.summarize_cube, analytics.select_districts(cube, districts))
+    commodities = timer.run('commodity_parse', analytics.parse_commodity_column, df)
+    trend = timer.run('trend_groupby', analytics.aggregate_trend, cube, 'Bulanan')
+    figures = timer.run('figure_build', build_figures, cube, trend)
+    payload = sum(len(fig.to_json()) for fig in figures)
+
+    export_path = os.path.join(work_dir, 'export.csv')
+    with open(export_path, 'wb') as f:
+        timer.run('csv_export', data_store.export_frame, df, f, 'CSV')
+
+    return {
+        'rows': n_rows,
+        'loaded_rows': len(df),
+        'districts': district_count,
+        'source_bytes': os.path.getsize(source),
+        'filtered_rows': len(rows),
+        'summary_count': summary['count'] if summary else 0,
+        'commodity_rows': len(commodities),
+        'trend_points': len(trend),
+        'figure_payload_bytes': payload,
+        'export_bytes': os.path.getsize(export_path),
+        'memory_bytes': int(df.memory_usage(deep=True).sum()),
+        'stages': timer.stages,
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark pipeline dashboard pada data sintetis.")
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_ROWS, help="Jumlah baris per dataset sintetis")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="File JSON hasil (default: stdout)")
+    parser.add_argument('--work-dir', help="Direktori kerja untuk dataset dan cache (default: direktori sementara)")
+    args = parser.parse_args(argv)
+
+    pd.set_option('mode.copy_on_write', True)
+    results = []
+    for n_rows in args.rows:
+        work_dir = tempfile.mkdtemp(prefix=f'bench_{n_rows}_', dir=args.work_dir)
+        try:
+            results.append(run_benchmark(n_rows, work_dir, args.seed))
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'revision': _git_revision(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'schema_version': data_store.SCHEMA_VERSION,
+        'results': results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""Figure Plotly yang dipakai bersama oleh dashboard dan snapshot statis.
+
+Fungsi di sini tidak bergantung pada Streamlit: masukannya tabel yang sudah
+direduksi oleh ``analytics`` dan keluarannya ``go.Figure``, sehingga grafik
+di dashboard dan di artefak snapshot identik.
+"""
+import numpy as np
+import plotly.graph_objects as go
+from plotly.colors import hex_to_rgb
+
+# Konfigurasi tema warna yang solid (tanpa opacity)
+solid_colors = {
+    'positive': '#1f77b4',  # Biru solid
+    'negative': '#d62728',  # Merah solid
+    'neutral': '#2ca02c',   # Hijau solid
+    'highlight': '#ff7f0e'  # Oranye solid
+}
+
+
+def _rgba(color, alpha):
+    r, g, b = hex_to_rgb(color)
+    return f'rgba({r}, {g}, {b}, {alpha})'
+
+
+# Skala warna Plotly dengan saturasi berbeda berdasarkan nilai (opacity 0.3 untuk nilai kecil hingga 1 untuk nilai terbesar).
+# Dengan negative_color, skala menjadi divergen: negatif di kiri (merah), positif di kanan (biru)
+def get_color_scale(color_base, negative_color=None):
+    if negative_color is None:
+        return [[0, _rgba(color_base, 0.3)], [1, _rgba(color_base, 1.0)]]
+    return [
+        [0, _rgba(negative_color, 1.0)],
+        [0.5, _rgba(negative_color, 0.3)],
+        [0.5, _rgba(color_base, 0.3)],
+        [1, _rgba(color_base, 1.0)],
+    ]
+
+
+# Marker batang berwarna dalam satu pass NumPy: nilai positif dinormalisasi terhadap maksimum positif,
+# nilai negatif terhadap minimum negatif, lalu dipetakan ke skala warna bawaan Plotly
+def get_bar_marker(values, color_base, negative_color=None):
+    values = np.nan_to_num(np.asarray(values, dtype='float64'))
+    positive_max = np.abs(values[values >= 0]).max(initial=0)
+    negative_max = np.abs(values[values < 0]).max(initial=0)
+    scale = np.where(values >= 0, positive_max, negative_max)
+    normalized = np.divide(np.abs(values), scale, out=np.zeros_like(values), where=scale > 0)
+
+    if negative_color is None:
+        return dict(color=normalized, colorscale=get_color_scale(color_base), cmin=0, cmax=1)
+    position = np.where(values >= 0, 0.5 + 0.5 * normalized, 0.5 - 0.5 * normalized)
+    return dict(color=position, colorscale=get_color_scale(color_base, negative_color), cmin=0, cmax=1)
+
+
+# Grafik batang perubahan harga per kabupaten/kota (hasil analytics.reduce_by_district);
+# highlight menyorot satu kabupaten/kota
+def price_change_figure(price_by_district, statistic, show_values, highlight=None):
+    # Sort data for better visualization
+    sorted_df = price_by_district.sort_values('Indikator Perubahan Harga (%)', ascending=False)
+    
+    # Create color array based on values with saturation
+    marker = get_bar_marker(sorted_df['Indikator Perubahan Harga (%)'], solid_colors['positive'], solid_colors['negative'])
+    if highlight is not None:
+        # Garis tepi oranye pada batang kabupaten/kota yang disorot
+        selected = (sorted_df['Kab/Kota'] == highlight).to_numpy()
+        marker['line'] = dict(color=np.where(selected, solid_colors['highlight'], 'rgba(0, 0, 0, 0)'),
+                              width=np.where(selected, 3, 0))
+    
+    # Create interactive bar chart with Plotly
+    fig = go.Figure()
+    
+    # Add bars
+    fig.add_trace(go.Bar(
+        x=sorted_df['Kab/Kota'],
+        y=sorted_df['Indikator Perubahan Harga (%)'],
+        marker=marker,
+        text=[f"{x:.2f}%" for x in sorted_df['Indikator Perubahan Harga (%)']] if show_values else None,
+        textposition='outside',
+        hovertemplate='<b>%{x}</b><br>Perubahan: %{y:.2f}%<br>%{customdata[0]}<extra></extra>',
+        customdata=sorted_df[['Keterangan']]
+    ))
+    
+    # Update layout
+    fig.update_layout(
+        title={
+            'text': f'Perubahan Harga per Kabupaten/Kota ({statistic})',
+            'font': {'size': 24, 'color': 'black', 'family': 'Arial, sans-serif'}
+        },
+        xaxis_title={
+            'text': 'Kabupaten/Kota',
+            'font': {'size': 16, 'color': 'black', 'family': 'Arial, sans-serif'}
+        },
+        yaxis_title={
+            'text': 'Perubahan Harga (%)',
+            'font': {'size': 16, 'color': 'black', 'family': 'Arial, sans-serif'}
+        },
+        xaxis={'categoryorder': 'total descending', 'tickangle': -45},
+        plot_bgcolor='white',
+        height=600,
+        margin=dict(t=100, b=100, l=70, r=40),
+        hoverlabel=dict(bgcolor="white", font_size=14, font_family="Arial, sans-serif"),
+        uniformtext_minsize=10,
+        uniformtext_mode='hide'
+    )
+    
+    # Adjust y-axis range to accommodate text labels
+    max_val = sorted_df['Indikator Perubahan Harga (%)'].max()
+    min_val = sorted_df['Indikator Perubahan Harga (%)'].min()
+    padding = (max_val - min_val) * 0.15  # Add 15% padding
+    
+    fig.update_yaxes(
+        showgrid=True,
+        gridwidth=1,
+        gridcolor='lightgray',
+        range=[min_val - padding if min_val < 0 else min_val * 0.9, max_val * 1.15]
+    )
+    return fig
+
+
+# Grafik batang komoditas teratas (hasil CommodityIndex.top_commodities)
+def top_commodities_figure(top, n, show_values):
+    fig = go.Figure(go.Bar(
+        x=top.index,
+        y=top['Total Andil'],
+        marker=get_bar_marker(top['Total Andil'], solid_colors['positive'], solid_colors['negative']),
+        text=[f"{x:.2f}" for x in top['Total Andil']] if show_values else None,
+        textposition='outside',
+        customdata=top[['Kemunculan Andil', 'Andil Teratas', 'Fluktuasi Tertinggi']],
+        hovertemplate='<b>%{x}</b><br>Total andil: %{y:.2f}<br>Muncul di andil: %{customdata[0]} kali<br>'
+                      'Andil teratas: %{customdata[1]} kali<br>Fluktuasi tertinggi: %{customdata[2]} kali<extra></extra>'
+    ))
+    fig.update_layout(
+        title={'text': f'{n} Komoditas dengan Total Andil Terbesar', 'font': {'size': 24, 'color': 'black', 'family': 'Arial, sans-serif'}},
+        yaxis_title='Total Andil',
+        xaxis={'tickangle': -45},
+        plot_bgcolor='white',
+        height=500,
+        margin=dict(t=100, b=140, l=70, r=40),
+        hoverlabel=dict(bgcolor="white", font_size=14, font_family="Arial, sans-serif")
+    )
+    fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='lightgray')
+    return fig
+
+
+# Heatmap andil (hasil CommodityMatrix.by_period atau by_commodity) sebagai satu trace:
+# kolom matriks sudah berupa label sumbu x, sel kosong (NaN) tidak diwarnai.
+# Skala divergen berpusat di 0: andil negatif merah, positif biru
+def commodity_heatmap_figure(matrix, title, statistic, xaxis_title):
+    fig = go.Figure(go.Heatmap(
+        z=np.round(matrix.to_numpy(dtype='float64'), 4),
+        x=matrix.columns.astype(str),
+        y=matrix.index.astype(str),
+        colorscale=get_color_scale(solid_colors['positive'], solid_colors['negative']),
+        zmid=0,
+        xgap=1,
+        ygap=1,
+        colorbar=dict(title=statistic),
+        hovertemplate=f'<b>%{{y}}</b><br>%{{x}}<br>{statistic}: %{{z:.3f}}<extra></extra>'
+    ))
+    fig.update_layout(
+        title={'text': title, 'font': {'size': 24, 'color': 'black', 'family': 'Arial, sans-serif'}},
+        xaxis={'title': xaxis_title, 'tickangle': -45, 'type': 'category'},
+        yaxis={'title': 'Kabupaten/Kota', 'autorange': 'reversed', 'type': 'category'},
+        plot_bgcolor='white',
+        # Tinggi mengikuti jumlah kabupaten/kota agar label tetap terbaca, dibatasi untuk seleksi besar
+        height=min(1600, max(400, 24 * len(matrix) + 220)),
+        margin=dict(t=100, b=140, l=70, r=40),
+        hoverlabel=dict(bgcolor="white", font_size=14, font_family="Arial, sans-serif")
+    )
+    return fig
@@ -0,0 +1,722 @@
+"""Penyimpanan data harga yang sudah dinormalisasi dalam format kolumnar.
+
+Parsing CSV beserta konversi tipe hanya dilakukan sekali per versi file sumber.
+Hasilnya disimpan sebagai file Feather (Arrow IPC) di direktori cache dan
+dibaca kembali dengan memory-map pada cold start berikutnya.
+
+Rilis mingguan baru cukup diletakkan di direktori ``incoming/``. Setiap file
+baru dinormalisasi sekali dan disimpan sebagai segmen tambahan; hanya baris
+dengan kunci (Tahun, Bulan, Minggu, No) yang belum ada yang ikut disimpan.
+Tabel turunan (lihat ``load_derived``) juga dibangun per segmen sehingga
+rilis baru tidak memicu perhitungan ulang seluruh histori.
+
+Untuk deployment multi-provinsi, setiap segmen juga ditulis ke partisi Hive
+per provinsi dan tahun (``<cache>/data.partitions/<tabel>/Provinsi=.../Tahun=...``).
+``load_partitioned`` hanya membaca partisi yang cocok dengan filter provinsi/tahun,
+sehingga waktu load dan memori mengikuti seleksi, bukan seluruh dataset nasional.
+
+Cache dapat dibangun terlebih dahulu saat deploy:
+
+    python data_store.py build --source data.csv
+    python data_store.py ingest
+"""
+import argparse
+import csv
+import glob
+import gzip
+import hashlib
+import io
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from urllib.parse import unquote
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.dataset as ds
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+import validation
+
+try:
+    import fcntl
+except ImportError:  # Windows: hanya kunci antar-thread
+    fcntl = None
+
+DATA_FILE = 'data.csv'
+CACHE_DIR = '.cache'
+INCOMING_DIR = 'incoming'
+# Naikkan jika skema hasil normalisasi berubah agar cache lama tidak dipakai
+SCHEMA_VERSION = 5
+
+COLUMNS = ['Tahun', 'Bulan', 'Minggu', 'No', 'Provinsi', 'Kab/Kota',
+           'Indikator Perubahan Harga (%)', 'Komoditas Andil Perubahan Harga',
+           'Fluktuasi Harga Tertinggi', 'Nilai', 'Disparitas Harga Antar Daerah',
+           'Tanggal', 'Bulan_Nama', 'Periode_Minggu']
+NUMERIC_COLUMNS = ['Indikator Perubahan Harga (%)', 'Nilai', 'Disparitas Harga Antar Daerah']
+CATEGORY_COLUMNS = ['Provinsi', 'Kab/Kota', 'Bulan_Nama', 'Fluktuasi Harga Tertinggi']
+# Skema ringkas: kode waktu/wilayah sebagai integer kecil, metrik float32,
+# teks andil (hampir selalu unik) sebagai string berbasis Arrow
+COMPACT_DTYPES = {
+    'Tahun': 'int16',
+    'Bulan': 'int8',
+    'Minggu': 'int8',
+    'No': 'int16',
+    'Indikator Perubahan Harga (%)': 'float32',
+    'Nilai': 'float32',
+    'Disparitas Harga Antar Daerah': 'float32',
+    'Komoditas Andil Perubahan Harga': 'string[pyarrow]',
+}
+KEY_COLUMNS = ['Tahun', 'Bulan', 'Minggu', 'No']
+# Kunci partisi (urutan direktori) dan kolom id baris global di file partisi
+PARTITION_COLUMNS = ['Provinsi', 'Tahun']
+ROW_ID = 'row'
+# Format unduhan: (ekstensi file, MIME type)
+EXPORT_FORMATS = {
+    'CSV': ('csv', 'text/csv'),
+    'CSV (gzip)': ('csv.gz', 'application/gzip'),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet'),
+}
+EXPORT_CHUNK_ROWS = 50_000
+
+logger = logging.getLogger(__name__)
+
+
+# Hash isi file dibaca per blok agar memori tetap kecil untuk file besar
+def _file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Sidik jari file sumber: ukuran, mtime dan (opsional) hash isi
+def file_fingerprint(path, with_hash=True):
+    stat = os.stat(path)
+    fingerprint = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    if with_hash:
+        fingerprint['sha256'] = _file_sha256(path)
+    return fingerprint
+
+
+def _incoming_files(incoming_dir):
+    if not incoming_dir:
+        return []
+    return sorted(glob.glob(os.path.join(incoming_dir, '*.csv')))
+
+
+# Versi data yang murah dihitung (tanpa membaca isi file), dipakai sebagai kunci cache Streamlit.
+# Mencakup file sumber utama dan seluruh rilis di direktori incoming.
+def data_version(path=DATA_FILE, incoming_dir=INCOMING_DIR):
+    parts = []
+    for file_path in [path] + _incoming_files(incoming_dir):
+        try:
+            fingerprint = file_fingerprint(file_path, with_hash=False)
+        except OSError:
+            parts.append(f"{file_path}:missing")
+            continue
+        parts.append(f"{file_path}:{fingerprint['size']:x}-{fingerprint['mtime_ns']:x}")
+    if len(parts) == 1:
+        return parts[0].split(':', 1)[1]
+    return hashlib.sha1('|'.join(parts).encode()).hexdigest()[:16]
+
+
+def _cache_paths(source, cache_dir):
+    name = os.path.splitext(os.path.basename(source))[0]
+    base = os.path.join(cache_dir, name)
+    return base + '.feather', base + '.meta.json'
+
+
+def _segment_path(cache_dir, file_name):
+    return os.path.join(cache_dir, file_name)
+
+
+def _partition_root(source, cache_dir):
+    name = os.path.splitext(os.path.basename(source))[0]
+    return os.path.join(cache_dir, f'{name}.partitions')
+
+
+# Titik waktu minggu ke-n dalam bulan: hari ke-(7n - 6), dibatasi ke akhir bulan. Tanpa batas ini
+# minggu 5 Februari (tahun non-kabisat) jatuh pada 1 Maret, sama dengan minggu 1 Maret.
+# Tanggal hasil pembatasan selalu tetap di bulannya, sehingga pengelompokan bulan/kuartal tidak bergeser
+def week_period(month_start, week):
+    period = month_start + pd.to_timedelta((week.astype('int64') - 1) * 7, unit='D')
+    return period.where(period.dt.month == month_start.dt.month, month_start + pd.offsets.MonthEnd(0))
+
+
+# Normalisasi tipe kolom dari frame yang sudah divalidasi (lihat validation.validate_frame)
+def normalize_data(df):
+    # Add date column for time series analysis
+    df['Tanggal'] = pd.to_datetime(dict(year=df['Tahun'], month=df['Bulan'], day=1))
+    # Nama bulan diformat sekali untuk 12 bulan lalu diambil per baris (strftime per baris lambat)
+    month_names = pd.date_range('2000-01-01', periods=12, freq='MS').strftime('%B').to_numpy()
+    df['Bulan_Nama'] = month_names[df['Tanggal'].dt.month.to_numpy() - 1]
+    # Setiap (Tahun, Bulan, Minggu) mendapat titik waktu sendiri
+    df['Periode_Minggu'] = week_period(df['Tanggal'], df['Minggu'])
+
+    for col in CATEGORY_COLUMNS:
+        df[col] = df[col].astype('category')
+    return df.astype({col: dtype for col, dtype in COMPACT_DTYPES.items() if col in df.columns})
+
+
+# Pemakaian memori per kolom (byte) sebelum dan sesudah normalisasi ringkas
+def memory_report(source=DATA_FILE):
+    raw = pd.read_csv(source)
+    compact = read_source(source)
+    raw = raw.set_axis(raw.columns.str.strip(), axis=1)
+    report = pd.DataFrame({
+        'sebelum': raw.memory_usage(deep=True, index=False),
+        'sesudah': compact.memory_usage(deep=True, index=False),
+    }).reindex(compact.columns).fillna(0).astype('int64')
+    report.loc['TOTAL'] = report.sum()
+    report['rasio'] = (report['sesudah'] / report['sebelum'].where(report['sebelum'] > 0)).round(3)
+    return report
+
+
+# Semua kolom dibaca sebagai string Arrow (tanpa inferensi tipe), sehingga validasi
+# melihat isian asli seperti "-" dan "0" apa adanya
+def read_text_csv(source):
+    with open(source, newline='', encoding='utf-8-sig') as f:
+        header = next(csv.reader(f), [])
+    table = pa_csv.read_csv(source, convert_options=pa_csv.ConvertOptions(
+        column_types={name: pa.string() for name in header}, strings_can_be_null=True))
+    return table.to_pandas(types_mapper={pa.string(): pd.StringDtype('pyarrow')}.get)
+
+
+# Baca file sebagai teks lalu validasi seluruhnya sebelum konversi tipe.
+# Mengembalikan (frame tervalidasi, laporan penolakan); skema yang rusak memunculkan ValidationError
+def validate_source(source=DATA_FILE):
+    raw = read_text_csv(source)
+    df, report = validation.validate_frame(raw)
+    if not report.empty:
+        level = logging.WARNING if report['Tindakan'].isin(['baris ditolak', 'dikosongkan']).any() else logging.INFO
+        logger.log(level, "Validasi %s: %s\n%s", source,
+                   validation.summarize_report(report, len(raw) - len(df)), report.to_string(index=False))
+    return df, report
+
+
+def read_source(source=DATA_FILE):
+    df, _ = validate_source(source)
+    return normalize_data(df)
+
+
+# Cache valid jika skema sama dan file sumber tidak berubah.
+# Ukuran + mtime dicek lebih dulu; hash hanya dihitung bila mtime berbeda (mis. file disalin ulang saat deploy)
+def _source_unchanged(path, recorded):
+    try:
+        current = file_fingerprint(path, with_hash=False)
+    except OSError:
+        return False
+    if current['size'] != recorded.get('size'):
+        return False
+    if current['mtime_ns'] == recorded.get('mtime_ns'):
+        return True
+    return _file_sha256(path) == recorded.get('sha256')
+
+
+def _cache_is_valid(source, meta):
+    if meta.get('schema_version') != SCHEMA_VERSION:
+        return False
+    if not _source_unchanged(source, meta):
+        return False
+    # Rilis yang sudah diingest boleh dihapus dari incoming, tetapi tidak boleh diubah
+    for segment in meta.get('segments', []):
+        if os.path.exists(segment['source']) and not _source_unchanged(segment['source'], segment):
+            return False
+    return True
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# Kunci store per file sumber: RLock untuk thread dalam satu proses (sesi Streamlit) dan flock
+# pada <cache>/<nama>.lock untuk proses lain (mis. dashboard dan api.py pada .cache yang sama).
+# Reentrant, sehingga fungsi publik yang saling memanggil cukup memegang kunci yang sama.
+# Bila file kunci tidak dapat dibuat (direktori read-only), cache memang tidak akan ditulis
+# dan kunci antar-thread sudah cukup
+_STORE_LOCKS = {}
+_STORE_LOCKS_GUARD = threading.Lock()
+
+
+@contextmanager
+def _store_lock(source, cache_dir):
+    name = os.path.splitext(os.path.basename(source))[0]
+    lock_path = os.path.abspath(os.path.join(cache_dir, f'{name}.lock'))
+    with _STORE_LOCKS_GUARD:
+        state = _STORE_LOCKS.setdefault(lock_path, {'lock': threading.RLock(), 'depth': 0, 'file': None})
+    with state['lock']:
+        if state['depth'] == 0 and fcntl is not None:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                state['file'] = open(lock_path, 'a')
+                fcntl.flock(state['file'], fcntl.LOCK_EX)
+            except OSError as e:
+                logger.debug("Kunci store %s tidak tersedia: %s", lock_path, e)
+        state['depth'] += 1
+        try:
+            yield
+        finally:
+            state['depth'] -= 1
+            if state['depth'] == 0 and state['file'] is not None:
+                state['file'].close()
+                state['file'] = None
+
+
+# File sementara unik di direktori tujuan; penulis paralel tidak saling menimpa file sementara
+@contextmanager
+def _atomic_path(path):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+    os.close(fd)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _write_meta(meta, meta_path):
+    with _atomic_path(meta_path) as tmp_path:
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+
+
+# Tulis ke file sementara lalu rename agar pembaca lain tidak melihat file setengah jadi
+def _write_frame(df, path):
+    with _atomic_path(path) as tmp_path:
+        df.reset_index(drop=True).to_feather(tmp_path, compression='uncompressed')
+
+
+# Uncompressed Feather dapat di-memory-map tanpa parsing ulang.
+# Kolom string dibaca kembali sebagai string[pyarrow] sesuai COMPACT_DTYPES
+def _read_frame(path):
+    with pd.option_context('mode.string_storage', 'pyarrow'):
+        return feather.read_table(path, memory_map=True).to_pandas()
+
+
+# Gabungkan frame per segmen; kategori disatukan dulu agar kolom tidak jatuh menjadi object
+def concat_frames(frames):
+    frames = [f for f in frames if f is not None]
+    if not frames:
+        return pd.DataFrame(columns=COLUMNS)
+    if len(frames) == 1:
+        return frames[0]
+    for col in frames[0].columns:
+        if all(isinstance(f[col].dtype, pd.CategoricalDtype) for f in frames):
+            categories = pd.api.types.union_categoricals([f[col] for f in frames]).categories
+            frames = [f.assign(**{col: f[col].cat.set_categories(categories)}) for f in frames]
+    return pd.concat(frames, ignore_index=True)
+
+
+# Buang baris yang kuncinya sudah ada di store (dan duplikat di dalam rilis itu sendiri)
+def drop_seen_keys(new_df, seen_keys):
+    new_df = new_df.drop_duplicates(subset=KEY_COLUMNS, keep='first')
+    new_keys = pd.MultiIndex.from_frame(new_df[KEY_COLUMNS])
+    return new_df[~new_keys.isin(seen_keys)]
+
+
+# Tulis ulang base cache dari file sumber utama; segmen dan tabel turunan lama dibuang
+def write_cache(df, source=DATA_FILE, cache_dir=CACHE_DIR):
+    cache_path, meta_path = _cache_paths(source, cache_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+    cache_stem = os.path.splitext(os.path.basename(cache_path))[0]
+    for stale in glob.glob(os.path.join(cache_dir, f"{cache_stem}.*.feather")):
+        os.remove(stale)
+    _remove_tree(_partition_root(source, cache_dir))
+
+    meta = file_fingerprint(source)
+    meta['schema_version'] = SCHEMA_VERSION
+    meta['rows'] = len(df)
+    meta['derived'] = {}
+    meta['segments'] = []
+
+    _write_frame(df, cache_path)
+    _write_meta(meta, meta_path)
+    return meta
+
+
+# Pindahkan direktori ke nama sementara sebelum dihapus, sehingga path aslinya langsung hilang utuh
+def _remove_tree(path):
+    if not os.path.isdir(path):
+        return
+    trash = tempfile.mkdtemp(dir=os.path.dirname(path), prefix=f'.{os.path.basename(path)}.', suffix='.old')
+    os.replace(path, os.path.join(trash, 'tree'))
+    shutil.rmtree(trash, ignore_errors=True)
+
+
+# Baca semua rilis tanpa cache (dipakai bila direktori cache tidak dapat ditulis)
+def _read_uncached(source, incoming_dir):
+    frames = [read_source(source)]
+    seen_keys = pd.MultiIndex.from_frame(frames[0][KEY_COLUMNS])
+    for path in _incoming_files(incoming_dir):
+        try:
+            new_df = drop_seen_keys(read_source(path), seen_keys)
+        except validation.ValidationError as e:
+            logger.error("Rilis %s ditolak: %s", path, e)
+            continue
+        frames.append(new_df)
+        seen_keys = seen_keys.append(pd.MultiIndex.from_frame(new_df[KEY_COLUMNS]))
+    return frames
+
+
+# Simpan rilis baru sebagai segmen; hanya baris dengan kunci baru yang ditulis.
+# Kunci yang sudah ada cukup dibaca dari kolom kunci setiap segmen.
+def _ingest(meta, source, incoming_dir, cache_dir):
+    ingested = {segment['source'] for segment in meta['segments']}
+    new_files = [path for path in _incoming_files(incoming_dir) if path not in ingested]
+    if not new_files:
+        return False
+
+    cache_path, _ = _cache_paths(source, cache_dir)
+    cache_stem = os.path.splitext(os.path.basename(cache_path))[0]
+    key_frames = [feather.read_table(path, columns=KEY_COLUMNS).to_pandas() for path in _segment_files(meta, cache_path, cache_dir)]
+    seen_keys = pd.MultiIndex.from_frame(pd.concat(key_frames, ignore_index=True))
+    for path in new_files:
+        try:
+            new_df = drop_seen_keys(read_source(path), seen_keys)
+        except validation.ValidationError as e:
+            # Rilis dengan skema rusak dilewati (dicoba lagi setelah diperbaiki); store tetap dapat dipakai
+            logger.error("Rilis %s ditolak: %s", path, e)
+            continue
+        segment = file_fingerprint(path)
+        segment.update({
+            'source': path,
+            'rows': len(new_df),
+            'file': f"{cache_stem}.seg{len(meta['segments']) + 1:04d}.feather",
+            'derived': {},
+        })
+        _write_frame(new_df, _segment_path(cache_dir, segment['file']))
+        meta['segments'].append(segment)
+        seen_keys = seen_keys.append(pd.MultiIndex.from_frame(new_df[KEY_COLUMNS]))
+    return True
+
+
+def _segment_files(meta, cache_path, cache_dir):
+    return [cache_path] + [_segment_path(cache_dir, segment['file']) for segment in meta['segments']]
+
+
+# Pastikan store sesuai dengan file sumber dan direktori incoming.
+# Mengembalikan metadata store, atau None bila cache tidak dapat ditulis.
+def sync_store(source=DATA_FILE, incoming_dir=INCOMING_DIR, cache_dir=CACHE_DIR):
+    cache_path, meta_path = _cache_paths(source, cache_dir)
+    try:
+        with _store_lock(source, cache_dir):
+            meta = _read_meta(meta_path)
+            if meta is None or not os.path.exists(cache_path) or not _cache_is_valid(source, meta):
+                meta = write_cache(read_source(source), source, cache_dir)
+            if _ingest(meta, source, incoming_dir, cache_dir):
+                _write_meta(meta, meta_path)
+    except OSError as e:
+        # Direktori read-only tidak boleh menghentikan dashboard
+        logger.warning("Tidak dapat menulis cache %s: %s", cache_path, e)
+        return None
+    return meta
+
+
+# Baca seluruh segmen store (base + rilis tambahan)
+def load_segments(source=DATA_FILE, incoming_dir=INCOMING_DIR, cache_dir=CACHE_DIR):
+    with _store_lock(source, cache_dir):
+        meta = sync_store(source, incoming_dir, cache_dir)
+        if meta is None:
+            return _read_uncached(source, incoming_dir), None
+        cache_path, _ = _cache_paths(source, cache_dir)
+        return [_read_frame(path) for path in _segment_files(meta, cache_path, cache_dir)], meta
+
+
+# Indeks baris setiap segmen mengikuti posisinya di frame gabungan
+def _with_offsets(frames):
+    offset = 0
+    for frame in frames:
+        yield frame.set_axis(pd.RangeIndex(offset, offset + len(frame)))
+        offset += len(frame)
+
+
+def build_cache(source=DATA_FILE, cache_dir=CACHE_DIR, incoming_dir=INCOMING_DIR):
+    with _store_lock(source, cache_dir):
+        _, meta_path = _cache_paths(source, cache_dir)
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        return sync_store(source, incoming_dir, cache_dir)
+
+
+# Frame gabungan yang sudah dinormalisasi
+def load_normalized(source=DATA_FILE, cache_dir=CACHE_DIR, use_cache=True, incoming_dir=INCOMING_DIR):
+    if not use_cache:
+        return concat_frames(_read_uncached(source, incoming_dir))
+    frames, _ = load_segments(source, incoming_dir, cache_dir)
+    return concat_frames(frames)
+
+
+# Tabel turunan yang dibangun per segmen dan disimpan di samping segmennya,
+# sehingga rilis baru hanya memicu builder untuk segmen baru.
+# builder menerima frame segmen dengan indeks global dan harus mengembalikan frame datar.
+# Naikkan version bila logika builder berubah.
+def load_derived(name, builder, version=1, source=DATA_FILE, incoming_dir=INCOMING_DIR, cache_dir=CACHE_DIR):
+    with _store_lock(source, cache_dir):
+        meta = sync_store(source, incoming_dir, cache_dir)
+        if meta is None:
+            return concat_frames([builder(frame) for frame in _with_offsets(_read_uncached(source, incoming_dir))])
+
+        cache_path, meta_path = _cache_paths(source, cache_dir)
+        key = f"{name}-v{version}"
+        results = []
+        changed = False
+        for segment, segment_file, offset in _segments_with_offsets(meta, cache_path, cache_dir):
+            result, written = _segment_derived(segment, segment_file, offset, key, builder, cache_dir)
+            results.append(result)
+            changed |= written
+
+        if changed:
+            _write_meta(meta, meta_path)
+        return concat_frames(results)
+
+
+# (metadata segmen, file segmen, id baris global pertama) untuk base dan setiap rilis
+def _segments_with_offsets(meta, cache_path, cache_dir):
+    offset = 0
+    for segment, segment_file in zip([meta] + meta['segments'], _segment_files(meta, cache_path, cache_dir)):
+        yield segment, segment_file, offset
+        offset += segment['rows']
+
+
+# Tabel turunan satu segmen: dibaca dari file bila ada, selain itu dibangun lalu disimpan.
+# Mengembalikan (frame, apakah metadata segmen berubah)
+def _segment_derived(segment, segment_file, offset, key, builder, cache_dir):
+    derived_file = segment.setdefault('derived', {}).get(key)
+    if derived_file and os.path.exists(_segment_path(cache_dir, derived_file)):
+        return _read_frame(_segment_path(cache_dir, derived_file)), False
+
+    frame = _read_frame(segment_file)
+    result = builder(frame.set_axis(pd.RangeIndex(offset, offset + len(frame))))
+    derived_file = f"{os.path.splitext(os.path.basename(segment_file))[0]}.{key}.feather"
+    try:
+        _write_frame(result, _segment_path(cache_dir, derived_file))
+    except OSError as e:
+        logger.warning("Tidak dapat menulis tabel turunan %s: %s", derived_file, e)
+        return result, False
+    segment['derived'][key] = derived_file
+    return result, True
+
+
+# Tulis baris segmen ke partisi Hive Provinsi=.../Tahun=...; nama file memuat nama segmen
+# sehingga rilis baru hanya menambah file dan tidak menulis ulang partisi yang ada.
+# Dataset ditulis dulu ke direktori sementara di samping partition_dir, lalu setiap file
+# di-rename ke partisinya, sehingga pembaca tidak pernah melihat file partisi setengah jadi
+def _write_partitions(frame, partition_dir, basename):
+    frame = frame.assign(Provinsi=frame['Provinsi'].astype(str))
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    partition_root = os.path.dirname(partition_dir)
+    os.makedirs(partition_root, exist_ok=True)
+    staging_dir = tempfile.mkdtemp(dir=partition_root, prefix=f'.{basename}.', suffix='.tmp')
+    try:
+        ds.write_dataset(
+            table, staging_dir, format='feather',
+            partitioning=PARTITION_COLUMNS, partitioning_flavor='hive',
+            basename_template=f'{basename}-{{i}}.feather',
+            existing_data_behavior='overwrite_or_ignore',
+        )
+        for path in glob.glob(os.path.join(staging_dir, 'Provinsi=*', 'Tahun=*', '*.feather')):
+            target = os.path.join(partition_dir, os.path.relpath(path, staging_dir))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(path, target)
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+
+# Pastikan setiap segmen sudah ditulis ke partisi tabel `key` ('data' untuk baris data,
+# atau nama tabel turunan yang memiliki kolom id baris).
+# Kolom partisi tabel turunan diambil dari baris data asalnya lewat id baris.
+# Dipanggil di bawah _store_lock, sehingga penulis lain tidak menulis partisi yang sama bersamaan
+def _sync_partitions(meta, key, builder, source, cache_dir):
+    cache_path, meta_path = _cache_paths(source, cache_dir)
+    partition_dir = os.path.join(_partition_root(source, cache_dir), key)
+    changed = False
+    for segment, segment_file, offset in _segments_with_offsets(meta, cache_path, cache_dir):
+        done = segment.setdefault('partitioned', [])
+        if key in done:
+            continue
+        basename = os.path.splitext(os.path.basename(segment_file))[0]
+        if builder is None:
+            frame = _read_frame(segment_file)
+            frame.insert(0, ROW_ID, pd.RangeIndex(offset, offset + len(frame)))
+        else:
+            frame, _ = _segment_derived(segment, segment_file, offset, key, builder, cache_dir)
+            source_rows = feather.read_table(segment_file, columns=PARTITION_COLUMNS).to_pandas()
+            positions = frame[ROW_ID].to_numpy() - offset
+            for col in PARTITION_COLUMNS:
+                frame[col] = source_rows[col].to_numpy()[positions]
+        if len(frame):
+            _write_partitions(frame, partition_dir, basename)
+        done.append(key)
+        changed = True
+    if changed:
+        _write_meta(meta, meta_path)
+    return partition_dir
+
+
+def _partition_filter(provinces, years):
+    expression = None
+    if provinces:
+        expression = ds.field('Provinsi').isin([str(p) for p in provinces])
+    if years:
+        year_filter = ds.field('Tahun').isin([int(y) for y in years])
+        expression = year_filter if expression is None else expression & year_filter
+    return expression
+
+
+# Baca partisi yang lolos filter; partisi lain tidak pernah dibuka.
+# Tipe kolom partisi dan urutan baris dikembalikan seperti frame store biasa
+def _read_partitions(partition_dir, provinces, years):
+    if not os.path.isdir(partition_dir):
+        return None
+    dataset = ds.dataset(partition_dir, format='feather', partitioning='hive')
+    with pd.option_context('mode.string_storage', 'pyarrow'):
+        frame = dataset.to_table(filter=_partition_filter(provinces, years)).to_pandas()
+    frame['Provinsi'] = frame['Provinsi'].astype('category')
+    frame['Tahun'] = frame['Tahun'].astype(COMPACT_DTYPES['Tahun'])
+    return frame.sort_values(ROW_ID, kind='stable').reset_index(drop=True)
+
+
+def _filter_frame(frame, provinces, years):
+    mask = pd.Series(True, index=frame.index)
+    if provinces:
+        mask &= frame['Provinsi'].astype(str).isin([str(p) for p in provinces])
+    if years:
+        mask &= frame['Tahun'].isin([int(y) for y in years])
+    return frame[mask]
+
+
+# Pasangan (Provinsi, Tahun) yang tersedia, dibaca dari nama direktori partisi tanpa membuka data
+def partition_values(source=DATA_FILE, incoming_dir=INCOMING_DIR, cache_dir=CACHE_DIR):
+    with _store_lock(source, cache_dir):
+        meta = sync_store(source, incoming_dir, cache_dir)
+        if meta is None:
+            frame = load_normalized(source, cache_dir, use_cache=False, incoming_dir=incoming_dir)
+            return frame[PARTITION_COLUMNS].drop_duplicates().astype({'Provinsi': str}).sort_values(PARTITION_COLUMNS).reset_index(drop=True)
+        partition_dir = _sync_partitions(meta, 'data', None, source, cache_dir)
+        pairs = []
+        for path in glob.glob(os.path.join(partition_dir, 'Provinsi=*', 'Tahun=*')):
+            province_dir, year_dir = os.path.split(path)
+            pairs.append((unquote(os.path.basename(province_dir).split('=', 1)[1]), int(year_dir.split('=', 1)[1])))
+        return pd.DataFrame(sorted(pairs), columns=PARTITION_COLUMNS)
+
+
+# Baris data untuk provinsi/tahun terpilih (kosong berarti semua), dengan indeks = id baris global
+# sehingga tetap cocok dengan kolom `row` pada tabel turunan
+def load_partitioned(provinces=None, years=None, source=DATA_FILE, incoming_dir=INCOMING_DIR, cache_dir=CACHE_DIR):
+    with _store_lock(source, cache_dir):
+        meta = sync_store(source, incoming_dir, cache_dir)
+        if meta is None:
+            return _filter_frame(load_normalized(source, cache_dir, use_cache=False, incoming_dir=incoming_dir), provinces, years)
+        frame = _read_partitions(_sync_partitions(meta, 'data', None, source, cache_dir), provinces, years)
+        if frame is None:
+            return pd.DataFrame(columns=COLUMNS)
+        return frame.set_index(ROW_ID).rename_axis(None)[COLUMNS]
+
+
+# Tabel turunan (dengan kolom id baris) untuk provinsi/tahun terpilih, lihat load_derived
+def load_partitioned_derived(name, builder, version=1, provinces=None, years=None,
+                             source=DATA_FILE, incoming_dir=INCOMING_DIR, cache_dir=CACHE_DIR):
+    with _store_lock(source, cache_dir):
+        meta = sync_store(source, incoming_dir, cache_dir)
+        if meta is None:
+            frame = load_partitioned(provinces, years, source, incoming_dir, cache_dir)
+            return builder(frame)
+        key = f"{name}-v{version}"
+        frame = _read_partitions(_sync_partitions(meta, key, builder, source, cache_dir), provinces, years)
+        if frame is None:
+            return builder(load_partitioned(provinces, years, source, incoming_dir, cache_dir).iloc[:0])
+        return frame.drop(columns=PARTITION_COLUMNS)
+
+
+# Tulis frame ke file biner per potongan baris, sehingga tidak pernah ada satu string CSV utuh di memori.
+# rows (posisi baris) memungkinkan ekspor subset tanpa menyalin frame terlebih dahulu
+def export_frame(df, fileobj, fmt='CSV', chunk_rows=EXPORT_CHUNK_ROWS, rows=None):
+    total = len(df) if rows is None else len(rows)
+
+    def chunks():
+        for start in range(0, total, chunk_rows):
+            if rows is None:
+                yield df.iloc[start:start + chunk_rows]
+            else:
+                yield df.iloc[rows[start:start + chunk_rows]]
+
+    if fmt == 'Parquet':
+        schema = pa.Schema.from_pandas(df.iloc[:0], preserve_index=False)
+        # Kolom teks pada frame kosong terbaca sebagai tipe null; paksa menjadi string
+        for i, field in enumerate(schema):
+            if pa.types.is_null(field.type):
+                schema = schema.set(i, field.with_type(pa.string()))
+        with pq.ParquetWriter(fileobj, schema) as writer:
+            for chunk in chunks():
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+        return
+
+    raw = gzip.GzipFile(fileobj=fileobj, mode='wb') if fmt == 'CSV (gzip)' else fileobj
+    text = io.TextIOWrapper(raw, encoding='utf-8', newline='', write_through=True)
+    try:
+        df.iloc[:0].to_csv(text, index=False)
+        for chunk in chunks():
+            chunk.to_csv(text, index=False, header=False)
+        text.flush()
+    finally:
+        # Lepaskan wrapper tanpa menutup file tujuan milik pemanggil
+        text.detach()
+        if raw is not fileobj:
+            raw.close()
+
+
+def main(argv=None):
+    # Opsi lokasi dipasang di setiap subcommand, mis. "build --source data.csv"
+    locations = argparse.ArgumentParser(add_help=False)
+    locations.add_argument('--source', default=DATA_FILE)
+    locations.add_argument('--cache-dir', default=CACHE_DIR)
+    locations.add_argument('--incoming-dir', default=INCOMING_DIR)
+    parser = argparse.ArgumentParser(description="Kelola cache kolumnar data harga.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('build', parents=[locations], help="Bangun ulang seluruh cache dari file CSV sumber dan rilis incoming")
+    subparsers.add_parser('ingest', parents=[locations], help="Tambahkan rilis baru dari direktori incoming ke cache")
+    subparsers.add_parser('memory', parents=[locations], help="Tampilkan pemakaian memori per kolom sebelum dan sesudah normalisasi")
+    subparsers.add_parser('validate', parents=[locations],
+                          help="Tampilkan laporan validasi file sumber dan rilis incoming tanpa menulis cache")
+
+    args = parser.parse_args(argv)
+    if args.command == 'memory':
+        print(memory_report(args.source).to_string())
+        return
+    if args.command == 'validate':
+        for path in [args.source] + _incoming_files(args.incoming_dir):
+            try:
+                _, report = validate_source(path)
+            except validation.ValidationError as e:
+                print(f"{path}: ditolak ({e})")
+                continue
+            print(f"{path}: {len(report)} temuan")
+            if not report.empty:
+                print(report.to_string(index=False))
+        return
+    if args.command == 'build':
+        meta = build_cache(args.source, args.cache_dir, args.incoming_dir)
+    else:
+        meta = sync_store(args.source, args.incoming_dir, args.cache_dir)
+    if meta is None:
+        print("Cache tidak dapat ditulis")
+        return
+    rows = meta['rows'] + sum(segment['rows'] for segment in meta['segments'])
+    print(f"Cache di {args.cache_dir}: {rows} baris, {len(meta['segments'])} segmen rilis")
+
+
+if __name__ == '__main__':
+    main()
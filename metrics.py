@@ -0,0 +1,163 @@
+"""Instrumentasi jalur panas dashboard: waktu, memori puncak, baris, dan ukuran payload per bagian.
+
+Setiap rerun, termasuk rerun satu fragmen, membuat satu ``Recorder``. Bagian yang diukur dicatat sebagai log
+terstruktur (satu baris JSON per bagian pada logger ``dashboard.metrics``) dan
+diakumulasikan ke registry proses yang dapat diekspos dalam format teks
+Prometheus. Bila ``DASHBOARD_METRICS_FILE`` diisi, registry ditulis ke file
+tersebut setelah setiap rerun (pola textfile collector node_exporter).
+
+Memori puncak (tracemalloc) dan ukuran payload figure hanya diukur pada mode
+detail karena keduanya menambah biaya pada setiap rerun. tracemalloc bersifat
+global per proses, sedangkan Streamlit menjalankan sesi di thread paralel; karena
+itu memori puncak adalah puncak seluruh proses selama bagian berjalan, termasuk
+alokasi sesi lain yang berjalan bersamaan.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+logger = logging.getLogger('dashboard.metrics')
+
+METRICS_FILE_ENV = 'DASHBOARD_METRICS_FILE'
+
+
+# Akumulasi per bagian untuk seluruh proses (semua sesi)
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sections = {}
+
+    def observe(self, record):
+        with self._lock:
+            totals = self._sections.setdefault(record['section'], {
+                'count': 0, 'seconds': 0.0, 'seconds_max': 0.0, 'rows': 0,
+                'peak_bytes_max': 0, 'payload_bytes': 0,
+            })
+            totals['count'] += 1
+            totals['seconds'] += record['seconds']
+            totals['seconds_max'] = max(totals['seconds_max'], record['seconds'])
+            totals['rows'] += record['rows'] or 0
+            totals['peak_bytes_max'] = max(totals['peak_bytes_max'], record['peak_bytes'] or 0)
+            totals['payload_bytes'] += record['payload_bytes'] or 0
+
+    # Format eksposisi teks Prometheus
+    def prometheus_text(self):
+        series = [
+            ('dashboard_section_runs_total', 'counter', 'Jumlah eksekusi bagian dashboard', 'count'),
+            ('dashboard_section_seconds_total', 'counter', 'Total waktu eksekusi bagian (detik)', 'seconds'),
+            ('dashboard_section_seconds_max', 'gauge', 'Waktu eksekusi terlama bagian (detik)', 'seconds_max'),
+            ('dashboard_section_rows_total', 'counter', 'Total baris yang diproses bagian', 'rows'),
+            ('dashboard_section_peak_bytes_max', 'gauge', 'Memori puncak terbesar bagian (byte, mode detail)', 'peak_bytes_max'),
+            ('dashboard_section_payload_bytes_total', 'counter', 'Total ukuran payload figure (byte, mode detail)', 'payload_bytes'),
+        ]
+        with self._lock:
+            sections = {name: dict(totals) for name, totals in self._sections.items()}
+        lines = []
+        for name, kind, help_text, key in series:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for section, totals in sorted(sections.items()):
+                label = section.replace('\\', '\\\\').replace('"', '\\"')
+                lines.append(f'{name}{{section="{label}"}} {totals[key]}')
+        return '\n'.join(lines) + '\n'
+
+    # Tulis atomik agar collector tidak membaca file setengah jadi
+    def write_textfile(self, path):
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+
+
+REGISTRY = Registry()
+
+
+# Status tracemalloc bersama untuk semua Recorder di proses. Tracing dimulai oleh pengukuran
+# pertama dan dihentikan setelah pengukuran terakhir selesai; puncak hanya di-reset saat tidak ada
+# pengukuran lain yang aktif, sehingga sesi paralel tidak saling menghapus puncak atau tracing
+class _TraceState:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active = 0
+        self._started = False
+
+    def enter(self):
+        with self._lock:
+            if self._active == 0:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    self._started = True
+                tracemalloc.reset_peak()
+            self._active += 1
+            return tracemalloc.get_traced_memory()[0]
+
+    def exit(self):
+        with self._lock:
+            _, peak = tracemalloc.get_traced_memory()
+            self._active -= 1
+            if self._active == 0 and self._started:
+                tracemalloc.stop()
+                self._started = False
+            return peak
+
+
+_TRACE = _TraceState()
+
+
+# Pencatat per rerun; detailed=True mengaktifkan tracemalloc dan ukuran payload figure
+class Recorder:
+    def __init__(self, detailed=False, registry=REGISTRY):
+        self.detailed = detailed
+        self.registry = registry
+        self.records = []
+        self._active = []
+
+    @contextmanager
+    def measure(self, section, rows=None):
+        record = {'section': section, 'seconds': 0.0, 'rows': rows, 'peak_bytes': None, 'payload_bytes': None}
+        if self.detailed:
+            base = _TRACE.enter()
+        self._active.append(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = time.perf_counter() - start
+            self._active.pop()
+            if self.detailed:
+                # Puncak seluruh proses selama bagian ini berjalan (lihat _TraceState)
+                record['peak_bytes'] = max(_TRACE.exit() - base, 0)
+            self.records.append(record)
+            self.registry.observe(record)
+            logger.info(json.dumps(record))
+
+    # Apakah ada bagian yang sedang diukur (mis. fragmen yang dijalankan di dalam bagian induknya)
+    @property
+    def active(self):
+        return bool(self._active)
+
+    # Ukuran JSON figure yang dikirim ke browser, dicatat pada bagian yang sedang diukur
+    def add_figure(self, fig):
+        if not self.detailed or not self._active:
+            return
+        record = self._active[-1]
+        record['payload_bytes'] = (record['payload_bytes'] or 0) + len(fig.to_json())
+
+    def add_rows(self, rows):
+        if self._active:
+            record = self._active[-1]
+            record['rows'] = (record['rows'] or 0) + rows
+
+    # Tulis registry ke DASHBOARD_METRICS_FILE bila dikonfigurasi
+    def flush(self):
+        path = os.environ.get(METRICS_FILE_ENV)
+        if not path:
+            return
+        try:
+            self.registry.write_textfile(path)
+        except OSError as e:
+            logger.warning("Tidak dapat menulis metrik ke %s: %s", path, e)
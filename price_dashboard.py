@@ -1,167 +1,244 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime
-import calendar
-import matplotlib.colors as mcolors
+import functools
+import os
+import tempfile
+import threading
+import time
+
+import analytics
+import data_store
+import charts
+from charts import solid_colors, get_color_scale, get_bar_marker
+import metrics
+
+# Copy-on-Write: filter dan slice atas data bersama tidak menyalin kolom,
+# dan penulisan pada hasil turunan tidak pernah mengubah objek yang di-cache
+pd.set_option('mode.copy_on_write', True)
 
 # Set page config
-st.set_page_config(page_title="Kalimantan Barat Price Analysis", layout="wide", initial_sidebar_state="expanded")
-
-# Konfigurasi tema warna yang solid (tanpa opacity)
-solid_colors = {
-    'positive': '#1f77b4',  # Biru solid
-    'negative': '#d62728',  # Merah solid
-    'neutral': '#2ca02c',   # Hijau solid
-    'highlight': '#ff7f0e'  # Oranye solid
-}
+st.set_page_config(page_title="Analisis Perubahan Harga", layout="wide", initial_sidebar_state="expanded")
 
-# Fungsi untuk membuat warna dengan saturasi berbeda berdasarkan nilai
-def get_color_scale(values, color_base, is_negative=False):
-    normalized = np.abs(values) / np.abs(values).max() if len(values) > 0 and np.abs(values).max() > 0 else np.zeros_like(values)
-    
-    if is_negative:
-        # Untuk nilai negatif, gunakan warna merah dengan saturasi berbeda
-        base_rgb = mcolors.to_rgb(solid_colors['negative'])
-        return [f'rgba({int(base_rgb[0]*255)}, {int(base_rgb[1]*255)}, {int(base_rgb[2]*255)}, {0.3 + 0.7*n})' for n in normalized]
-    else:
-        # Untuk nilai positif, gunakan warna biru dengan saturasi berbeda
-        base_rgb = mcolors.to_rgb(solid_colors['positive'])
-        return [f'rgba({int(base_rgb[0]*255)}, {int(base_rgb[1]*255)}, {int(base_rgb[2]*255)}, {0.3 + 0.7*n})' for n in normalized]
+# Box plot ringkas dari kuartil yang sudah dihitung di server
+def build_distribution_figure(quantiles, title, yaxis_title, color):
+    fig = go.Figure(go.Box(
+        x=quantiles['Kab/Kota'],
+        q1=quantiles['q1'],
+        median=quantiles['median'],
+        q3=quantiles['q3'],
+        lowerfence=quantiles['lowerfence'],
+        upperfence=quantiles['upperfence'],
+        marker_color=color,
+        boxpoints=False,
+        name=''
+    ))
+    fig.update_layout(
+        title={'text': title, 'font': {'size': 18, 'color': 'black', 'family': 'Arial, sans-serif'}},
+        yaxis_title=yaxis_title,
+        xaxis={'tickangle': -45},
+        plot_bgcolor='white',
+        height=400,
+        margin=dict(t=60, b=100, l=70, r=40),
+        showlegend=False
+    )
+    fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='lightgray')
+    return fig
+
+TABLE_PAGE_SIZES = [25, 50, 100, 250]
+
+# File unduhan disimpan di direktori khusus dan dibersihkan setiap kali unduhan baru disiapkan
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), 'price_dashboard_exports')
+EXPORT_MAX_AGE = 3600
+EXPORT_MAX_FILES = 20
+
+# Nilai pilihan tren agregat; labelnya memuat nama wilayah terpilih (lihat region_label)
+TREND_AGGREGATE = "Agregat"
+
+# Batas cache. Tabel data disimpan sekali per proses (st.cache_resource) dan dibagi
+# read-only ke semua sesi; jumlah entri dibatasi per versi data dan seleksi partisi, bukan per pengguna.
+# Figure dan hasil query per filter memakai st.cache_data dengan batas entri dan TTL.
+DATA_CACHE_ENTRIES = 4
+FIGURE_CACHE_ENTRIES = 256
+FIGURE_CACHE_TTL = 3600
+
+# Pasangan provinsi/tahun yang tersedia, dari nama direktori partisi
+@st.cache_resource(max_entries=DATA_CACHE_ENTRIES)
+def load_partition_values(data_version):
+    return data_store.partition_values(data_store.DATA_FILE)
 
 # Load data
-@st.cache_data
-def load_data():
-    try:
-        # Load data from CSV file
-        df = pd.read_csv('data.csv')
-        
-        # Check column names and fix if needed
-        if 'Komoditas Andil Perubahan Harga ' in df.columns:
-            # Note the space at the end of the column name
-            df = df.rename(columns={'Komoditas Andil Perubahan Harga ': 'Komoditas Andil Perubahan Harga'})
-        
-        # Handle missing values and convert numeric columns
-        df['Indikator Perubahan Harga (%)'] = pd.to_numeric(df['Indikator Perubahan Harga (%)'], errors='coerce')
-        df['Nilai'] = pd.to_numeric(df['Nilai'], errors='coerce')
-        df['Disparitas Harga Antar Daerah'] = pd.to_numeric(df['Disparitas Harga Antar Daerah'], errors='coerce')
-        
-        # Add date column for time series analysis
-        df['Tanggal'] = pd.to_datetime(dict(year=df['Tahun'], month=df['Bulan'], day=1))
-        df['Bulan_Nama'] = df['Tanggal'].dt.strftime('%B')
-        
-        return df
-    except Exception as e:
-        st.error(f"Error loading data: {e}")
-        # Return empty DataFrame with expected columns if file not found
-        return pd.DataFrame(columns=['Tahun', 'Bulan', 'Minggu', 'No', 'Provinsi', 'Kab/Kota', 
-                                    'Indikator Perubahan Harga (%)', 'Komoditas Andil Perubahan Harga',
-                                    'Fluktuasi Harga Tertinggi', 'Nilai', 'Disparitas Harga Antar Daerah',
-                                    'Tanggal', 'Bulan_Nama'])
+# dataset_key = (versi data, provinsi, tahun). Versi data hanya dipakai sebagai kunci cache agar perubahan
+# data.csv atau rilis baru di incoming/ memicu reload; provinsi/tahun (kosong berarti semua) menentukan
+# partisi yang dibaca.
+# Loader tidak menangkap error: hasil gagal tidak boleh masuk cache, sehingga rerun berikutnya mencoba lagi
+# (error ditampilkan oleh show_load_error)
+@st.cache_resource(max_entries=DATA_CACHE_ENTRIES)
+def load_data(dataset_key):
+    _, provinces, years = dataset_key
+    # Load normalized data from the columnar cache (base CSV plus ingested weekly releases)
+    return analytics.load_data(provinces=provinces, years=years)
 
-df = load_data()
+# Tabel andil komoditas (terindeks per komoditas) dan cube agregat, dibagi ke semua sesi
+@st.cache_resource(max_entries=DATA_CACHE_ENTRIES)
+def load_commodity_data(dataset_key):
+    _, provinces, years = dataset_key
+    return analytics.load_commodity_table(provinces=provinces, years=years)
 
-# Sidebar filters
-st.sidebar.title("Filter Data")
+@st.cache_resource(max_entries=DATA_CACHE_ENTRIES)
+def load_aggregate_cube(dataset_key):
+    _, provinces, years = dataset_key
+    return analytics.load_aggregate_cube(provinces=provinces, years=years)
 
-# District selection (multi-select)
-all_districts = df['Kab/Kota'].unique().tolist()
-selected_districts = st.sidebar.multiselect(
-    "Pilih Kabupaten/Kota",
-    options=all_districts,
-    default=all_districts
-)
+# Nama wilayah untuk judul dan label agregat, mengikuti provinsi terpilih (kosong berarti semua)
+def region_label(provinces, all_provinces):
+    provinces = provinces or all_provinces
+    if len(provinces) == 1:
+        return provinces[0].title()
+    if set(provinces) == set(all_provinces):
+        return "Seluruh Provinsi"
+    if len(provinces) <= 3:
+        return ", ".join(province.title() for province in provinces)
+    return f"{len(provinces)} Provinsi Terpilih"
 
-# Opsi tampilan
-st.sidebar.title("Opsi Tampilan")
-show_values = st.sidebar.checkbox("Tampilkan Nilai pada Grafik", value=True)
+# Data gagal dimuat (mis. data.csv hilang atau store sedang rusak): tampilkan error dan hentikan rerun
+# ini tanpa menyimpan apa pun ke cache
+def show_load_error(error):
+    st.error(f"Error loading data: {error}")
+    st.stop()
 
-# Filter data based on selection
-if selected_districts:
-    filtered_df = df[df['Kab/Kota'].isin(selected_districts)]
-else:
-    filtered_df = df
+# Kuartil per kabupaten/kota atas seluruh histori, dihitung sekali per versi data
+@st.cache_resource(max_entries=DATA_CACHE_ENTRIES)
+def load_district_quantiles(dataset_key, metric):
+    return analytics.district_quantiles(load_data(dataset_key), metric)
 
-# Main content
-st.title("Analisis Perubahan Harga di Kalimantan Barat")
-st.markdown("Dashboard ini menampilkan analisis perubahan harga komoditas di Kalimantan Barat")
-
-# Overview metrics
-st.header("Ringkasan")
-col1, col2, col3 = st.columns(3)
-with col1:
-    # Handle potential NaN values in the mean calculation
-    mean_value = filtered_df['Indikator Perubahan Harga (%)'].mean()
-    if pd.isna(mean_value):
-        st.metric("Rata-rata Perubahan Harga", "Data tidak tersedia")
-    else:
-        st.metric("Rata-rata Perubahan Harga", f"{mean_value:.2f}%")
-with col2:
-    # Handle potential NaN values or empty DataFrame
-    if filtered_df.empty or filtered_df['Indikator Perubahan Harga (%)'].isna().all():
-        st.metric("Perubahan Harga Tertinggi", "Data tidak tersedia")
-    else:
-        max_idx = filtered_df['Indikator Perubahan Harga (%)'].idxmax()
-        max_val = filtered_df.loc[max_idx, 'Indikator Perubahan Harga (%)']
-        max_district = filtered_df.loc[max_idx, 'Kab/Kota']
-        st.metric("Perubahan Harga Tertinggi", f"{max_val:.2f}%", f"{max_district}")
-with col3:
-    # Handle potential NaN values or empty DataFrame
-    if filtered_df.empty or filtered_df['Indikator Perubahan Harga (%)'].isna().all():
-        st.metric("Perubahan Harga Terendah", "Data tidak tersedia")
-    else:
-        min_idx = filtered_df['Indikator Perubahan Harga (%)'].idxmin()
-        min_val = filtered_df.loc[min_idx, 'Indikator Perubahan Harga (%)']
-        min_district = filtered_df.loc[min_idx, 'Kab/Kota']
-        st.metric("Perubahan Harga Terendah", f"{min_val:.2f}%", f"{min_district}")
+# Urutan baris tabel untuk kombinasi filter terakhir sesi ini; berpindah halaman tidak memicu
+# pencarian ulang. Hanya satu array label per sesi yang disimpan (tanpa pickle), bukan satu
+# salinan indeks tabel per kombinasi filter
+def load_table_order(dataset_key, districts, search, column_filter, sort_column, ascending):
+    key = (dataset_key, districts, search, column_filter, sort_column, ascending)
+    cached = st.session_state.get('table_order')
+    if cached is None or cached[0] != key:
+        frame = analytics.select_districts(load_data(dataset_key), districts)
+        cached = (key, analytics.query_table(frame, search, column_filter, sort_column, ascending))
+        st.session_state['table_order'] = cached
+    return cached[1]
+
+# Figure builders: setiap grafik dibangun oleh fungsi ber-cache yang hanya menerima
+# versi data dan state filter yang memengaruhinya. Argumen dibuat hashable (tuple, str, bool)
+# sehingga perubahan satu widget hanya membangun ulang grafik yang bergantung padanya.
+
+@st.cache_data(max_entries=FIGURE_CACHE_ENTRIES, ttl=FIGURE_CACHE_TTL)
+def build_price_change_figure(dataset_key, districts, statistic, show_values):
+    cube = analytics.select_districts(load_aggregate_cube(dataset_key), districts)
+    price_by_district = analytics.reduce_by_district(cube, 'Indikator Perubahan Harga (%)', statistic)
+    if price_by_district.empty:
+        return None
+
+    return charts.price_change_figure(price_by_district, statistic, show_values)
 
-# Price change by region
-st.header("Perubahan Harga per Kabupaten/Kota")
+@st.cache_data(max_entries=FIGURE_CACHE_ENTRIES, ttl=FIGURE_CACHE_TTL)
+def build_disparity_figure(dataset_key, districts, statistic, show_values):
+    cube = analytics.select_districts(load_aggregate_cube(dataset_key), districts)
+    # Districts without disparity observations are dropped by the reduction
+    disparity_df = analytics.reduce_by_district(cube, 'Disparitas Harga Antar Daerah', statistic)
+    if disparity_df.empty:
+        return None
 
-# Create an interactive bar chart using Plotly
-if not filtered_df.empty and not filtered_df['Indikator Perubahan Harga (%)'].isna().all():
     # Sort data for better visualization
-    sorted_df = filtered_df.sort_values('Indikator Perubahan Harga (%)', ascending=False)
+    sorted_disparity_df = disparity_df.sort_values('Disparitas Harga Antar Daerah', ascending=False)
     
-    # Create color array based on values with saturation
-    positive_values = sorted_df['Indikator Perubahan Harga (%)'] >= 0
-    negative_values = sorted_df['Indikator Perubahan Harga (%)'] < 0
+    # Create color array with saturation
+    marker = get_bar_marker(sorted_disparity_df['Disparitas Harga Antar Daerah'], solid_colors['highlight'])
     
-    positive_colors = get_color_scale(sorted_df.loc[positive_values, 'Indikator Perubahan Harga (%)'], solid_colors['positive'])
-    negative_colors = get_color_scale(sorted_df.loc[negative_values, 'Indikator Perubahan Harga (%)'], solid_colors['negative'], is_negative=True)
+    # Create interactive bar chart with Plotly
+    fig = go.Figure()
     
-    # Combine colors
-    colors = []
-    pos_idx = 0
-    neg_idx = 0
-    for val in sorted_df['Indikator Perubahan Harga (%)']:
-        if val >= 0:
-            colors.append(positive_colors[pos_idx] if pos_idx < len(positive_colors) else solid_colors['positive'])
-            pos_idx += 1
-        else:
-            colors.append(negative_colors[neg_idx] if neg_idx < len(negative_colors) else solid_colors['negative'])
-            neg_idx += 1
+    # Add bars
+    fig.add_trace(go.Bar(
+        x=sorted_disparity_df['Kab/Kota'],
+        y=sorted_disparity_df['Disparitas Harga Antar Daerah'],
+        marker=marker,
+        text=[f"{x:.2f}" for x in sorted_disparity_df['Disparitas Harga Antar Daerah']] if show_values else None,
+        textposition='outside',
+        hovertemplate='<b>%{x}</b><br>Disparitas: %{y:.2f}<br>%{customdata[0]}<extra></extra>',
+        customdata=sorted_disparity_df[['Keterangan']]
+    ))
+    
+    # Update layout
+    fig.update_layout(
+        title={
+            'text': f'Disparitas Harga Antar Daerah ({statistic})',
+            'font': {'size': 24, 'color': 'black', 'family': 'Arial, sans-serif'}
+        },
+        xaxis_title={
+            'text': 'Kabupaten/Kota',
+            'font': {'size': 16, 'color': 'black', 'family': 'Arial, sans-serif'}
+        },
+        yaxis_title={
+            'text': 'Disparitas Harga (%)',
+            'font': {'size': 16, 'color': 'black', 'family': 'Arial, sans-serif'}
+        },
+        xaxis={'categoryorder': 'total descending', 'tickangle': -45},
+        plot_bgcolor='white',
+        height=600,
+        margin=dict(t=100, b=100, l=70, r=40),
+        hoverlabel=dict(bgcolor="white", font_size=14, font_family="Arial, sans-serif"),
+        uniformtext_minsize=10,
+        uniformtext_mode='hide'
+    )
+    
+    # Adjust y-axis range to accommodate text labels
+    max_val = sorted_disparity_df['Disparitas Harga Antar Daerah'].max()
+    
+    fig.update_yaxes(
+        showgrid=True,
+        gridwidth=1,
+        gridcolor='lightgray',
+        range=[0, max_val * 1.15]
+    )
+    return fig
+
+@st.cache_data(max_entries=FIGURE_CACHE_ENTRIES, ttl=FIGURE_CACHE_TTL)
+def build_district_distribution_figure(dataset_key, districts, metric, title, yaxis_title, color):
+    quantiles = analytics.select_districts(load_district_quantiles(dataset_key, metric), districts)
+    return build_distribution_figure(quantiles, title, yaxis_title, color)
+
+@st.cache_data(max_entries=FIGURE_CACHE_ENTRIES, ttl=FIGURE_CACHE_TTL)
+def build_commodity_figure(dataset_key, districts, commodity, show_values):
+    # Create a new dataframe with the contribution of the selected commodity
+    commodity_df = analytics.commodity_contributions(
+        load_data(dataset_key), load_commodity_data(dataset_key), commodity, districts
+    )
+    
+    if commodity_df.empty or commodity_df['Kontribusi'].isna().all() or (commodity_df['Kontribusi'] == 0).all():
+        return None
+
+    # Sort data for better visualization
+    sorted_commodity_df = commodity_df.sort_values('Kontribusi', ascending=False)
+    
+    # Create color array based on values with saturation
+    marker = get_bar_marker(sorted_commodity_df['Kontribusi'], solid_colors['positive'], solid_colors['negative'])
     
     # Create interactive bar chart with Plotly
     fig = go.Figure()
     
     # Add bars
     fig.add_trace(go.Bar(
-        x=sorted_df['Kab/Kota'],
-        y=sorted_df['Indikator Perubahan Harga (%)'],
-        marker_color=colors,
-        text=[f"{x:.2f}%" for x in sorted_df['Indikator Perubahan Harga (%)']] if show_values else None,
+        x=sorted_commodity_df['Kab/Kota'],
+        y=sorted_commodity_df['Kontribusi'],
+        marker=marker,
+        text=[f"{x:.2f}" for x in sorted_commodity_df['Kontribusi']] if show_values else None,
         textposition='outside',
-        hovertemplate='<b>%{x}</b><br>Perubahan: %{y:.2f}%<br>Bulan: %{customdata[0]}<br>Tahun: %{customdata[1]}<extra></extra>',
-        customdata=sorted_df[['Bulan_Nama', 'Tahun']]
+        hovertemplate='<b>%{x}</b><br>Kontribusi: %{y:.2f}<br>Perubahan Harga: %{customdata[0]:.2f}%<br>Bulan: %{customdata[1]}<br>Tahun: %{customdata[2]}<extra></extra>',
+        customdata=sorted_commodity_df[['Indikator Perubahan Harga (%)', 'Bulan_Nama', 'Tahun']]
     ))
     
     # Update layout
     fig.update_layout(
         title={
-            'text': 'Perubahan Harga per Kabupaten/Kota',
+            'text': f'Kontribusi {commodity} terhadap Perubahan Harga',
             'font': {'size': 24, 'color': 'black', 'family': 'Arial, sans-serif'}
         },
         xaxis_title={
@@ -169,7 +246,7 @@ if not filtered_df.empty and not filtered_df['Indikator Perubahan Harga (%)'].is
             'font': {'size': 16, 'color': 'black', 'family': 'Arial, sans-serif'}
         },
         yaxis_title={
-            'text': 'Perubahan Harga (%)',
+            'text': 'Kontribusi',
             'font': {'size': 16, 'color': 'black', 'family': 'Arial, sans-serif'}
         },
         xaxis={'categoryorder': 'total descending', 'tickangle': -45},
@@ -182,8 +259,8 @@ if not filtered_df.empty and not filtered_df['Indikator Perubahan Harga (%)'].is
     )
     
     # Adjust y-axis range to accommodate text labels
-    max_val = sorted_df['Indikator Perubahan Harga (%)'].max()
-    min_val = sorted_df['Indikator Perubahan Harga (%)'].min()
+    max_val = sorted_commodity_df['Kontribusi'].max()
+    min_val = sorted_commodity_df['Kontribusi'].min()
     padding = (max_val - min_val) * 0.15  # Add 15% padding
     
     fig.update_yaxes(
@@ -192,412 +269,904 @@ if not filtered_df.empty and not filtered_df['Indikator Perubahan Harga (%)'].is
         gridcolor='lightgray',
         range=[min_val - padding if min_val < 0 else min_val * 0.9, max_val * 1.15]
     )
-    
-    # Display the chart
-    st.plotly_chart(fig, use_container_width=True)
-else:
-    st.warning("Tidak ada data yang cukup untuk visualisasi perubahan harga.")
+    return fig
 
-# Price disparity analysis
-st.header("Disparitas Harga Antar Daerah")
+@st.cache_data(max_entries=FIGURE_CACHE_ENTRIES, ttl=FIGURE_CACHE_TTL)
+def build_trend_figure(dataset_key, districts, resolution, show_values, by_district, region):
+    cube = analytics.select_districts(load_aggregate_cube(dataset_key), districts)
+    tick_format = '%d %b %Y' if resolution == 'Mingguan' else '%b %Y'
 
-# Create a more attractive bar chart for price disparity using Plotly
-if not filtered_df.empty and not filtered_df['Disparitas Harga Antar Daerah'].isna().all():
-    # Filter out NaN values
-    disparity_df = filtered_df.dropna(subset=['Disparitas Harga Antar Daerah'])
-    
-    if not disparity_df.empty:
-        # Sort data for better visualization
-        sorted_disparity_df = disparity_df.sort_values('Disparitas Harga Antar Daerah', ascending=False)
+    if not by_district:
+        # Group by period and calculate average for all districts
+        time_series_df = analytics.aggregate_trend(cube, resolution)
         
-        # Create color array with saturation
-        colors = get_color_scale(sorted_disparity_df['Disparitas Harga Antar Daerah'], solid_colors['highlight'])
+        # Create interactive line chart with Plotly
+        fig = px.line(
+            time_series_df, 
+            x='Periode', 
+            y='Indikator Perubahan Harga (%)',
+            markers=True,
+            labels={
+                'Periode': 'Periode',
+                'Indikator Perubahan Harga (%)': 'Rata-rata Perubahan Harga (%)'
+            },
+            title=f'Tren Perubahan Harga {region}',
+            custom_data=['Label_Periode']
+        )
         
-        # Create interactive bar chart with Plotly
-        fig = go.Figure()
+        # Update trace
+        fig.update_traces(
+            line=dict(color=solid_colors['positive'], width=4),
+            marker=dict(size=12, color=solid_colors['positive']),
+            hovertemplate='<b>%{customdata[0]}</b><br>Perubahan: %{y:.2f}%<extra></extra>'
+        )
         
-        # Add bars
-        fig.add_trace(go.Bar(
-            x=sorted_disparity_df['Kab/Kota'],
-            y=sorted_disparity_df['Disparitas Harga Antar Daerah'],
-            marker_color=colors,
-            text=[f"{x:.2f}" for x in sorted_disparity_df['Disparitas Harga Antar Daerah']] if show_values else None,
-            textposition='outside',
-            hovertemplate='<b>%{x}</b><br>Disparitas: %{y:.2f}<br>Bulan: %{customdata[0]}<br>Tahun: %{customdata[1]}<extra></extra>',
-            customdata=sorted_disparity_df[['Bulan_Nama', 'Tahun']]
-        ))
+        # Add text labels if show_values is True
+        if show_values:
+            fig.update_traces(
+                text=time_series_df['Label_Nilai'],
+                textposition="top center",
+                mode='lines+markers+text'
+            )
+        legend = None
+    else:
+        # One point per district and period
+        trend_df = analytics.aggregate_trend(cube, resolution, by_district=True)
         
-        # Update layout
-        fig.update_layout(
-            title={
-                'text': 'Disparitas Harga Antar Daerah',
-                'font': {'size': 24, 'color': 'black', 'family': 'Arial, sans-serif'}
-            },
-            xaxis_title={
-                'text': 'Kabupaten/Kota',
-                'font': {'size': 16, 'color': 'black', 'family': 'Arial, sans-serif'}
-            },
-            yaxis_title={
-                'text': 'Disparitas Harga (%)',
-                'font': {'size': 16, 'color': 'black', 'family': 'Arial, sans-serif'}
+        # Create interactive line chart with Plotly Express
+        fig = px.line(
+            trend_df, 
+            x='Periode', 
+            y='Indikator Perubahan Harga (%)',
+            color='Kab/Kota',
+            markers=True,
+            text='Label_Nilai' if show_values else None,
+            labels={
+                'Periode': 'Periode',
+                'Indikator Perubahan Harga (%)': 'Perubahan Harga (%)',
+                'Kab/Kota': 'Kabupaten/Kota'
             },
-            xaxis={'categoryorder': 'total descending', 'tickangle': -45},
-            plot_bgcolor='white',
-            height=600,
-            margin=dict(t=100, b=100, l=70, r=40),
-            hoverlabel=dict(bgcolor="white", font_size=14, font_family="Arial, sans-serif"),
-            uniformtext_minsize=10,
-            uniformtext_mode='hide'
+            title='Tren Perubahan Harga per Kabupaten/Kota',
+            custom_data=['Kab/Kota', 'Label_Periode']
         )
         
-        # Adjust y-axis range to accommodate text labels
-        max_val = sorted_disparity_df['Disparitas Harga Antar Daerah'].max()
-        padding = max_val * 0.15  # Add 15% padding
-        
-        fig.update_yaxes(
-            showgrid=True,
-            gridwidth=1,
-            gridcolor='lightgray',
-            range=[0, max_val * 1.15]
+        # Update traces
+        fig.update_traces(
+            line=dict(width=3),
+            marker=dict(size=10),
+            hovertemplate='<b>%{customdata[0]}</b><br>Perubahan: %{y:.2f}%<br>%{customdata[1]}<extra></extra>'
         )
         
+        # Add text labels if show_values is True
+        if show_values:
+            fig.update_traces(
+                textposition="top center",
+                mode='lines+markers+text'
+            )
+        legend = dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        )
+    
+    # Add horizontal line at y=0
+    fig.add_hline(
+        y=0,
+        line_dash="dash",
+        line_color="gray",
+        line_width=2
+    )
+    
+    # Update layout
+    fig.update_layout(
+        font=dict(family="Arial, sans-serif"),
+        title_font=dict(size=24, color='black'),
+        xaxis_title_font=dict(size=16, color='black'),
+        yaxis_title_font=dict(size=16, color='black'),
+        xaxis=dict(tickformat=tick_format, tickangle=-45),
+        plot_bgcolor='white',
+        height=600,
+        margin=dict(t=100, b=100, l=70, r=40),
+        hoverlabel=dict(bgcolor="white", font_size=14, font_family="Arial, sans-serif")
+    )
+    if legend is not None:
+        fig.update_layout(legend=legend)
+    
+    # Add grid lines
+    fig.update_yaxes(
+        showgrid=True,
+        gridwidth=1,
+        gridcolor='lightgray'
+    )
+    
+    # Range slider untuk zoom ke minggu tertentu pada histori panjang
+    if resolution == 'Mingguan':
+        fig.update_xaxes(rangeslider_visible=True)
+    return fig
+
+# Tren linier dan sigma per kabupaten/kota / komoditas, dihitung sekali per versi data dan jendela
+@st.cache_data(max_entries=FIGURE_CACHE_ENTRIES, ttl=FIGURE_CACHE_TTL)
+def load_district_trends(dataset_key, districts, window_weeks):
+    cube = analytics.select_districts(load_aggregate_cube(dataset_key), districts)
+    return analytics.district_trends(cube, window_weeks=window_weeks)
+
+@st.cache_data(max_entries=FIGURE_CACHE_ENTRIES, ttl=FIGURE_CACHE_TTL)
+def load_commodity_trends(dataset_key, districts, window_weeks):
+    return analytics.commodity_trends(load_commodity_data(dataset_key), window_weeks, districts)
+
+# Peta kemiringan: satu titik per kabupaten/kota, warna divergen sesuai arah dan besar tren
+@st.cache_data(max_entries=FIGURE_CACHE_ENTRIES, ttl=FIGURE_CACHE_TTL)
+def build_slope_map_figure(dataset_key, districts, window_weeks):
+    trends = load_district_trends(dataset_key, districts, window_weeks).reset_index()
+    coordinates = trends['Kab/Kota'].map(analytics.DISTRICT_COORDINATES)
+    trends = trends[coordinates.notna() & trends['Kemiringan'].notna()]
+    if trends.empty:
+        return None
+    coordinates = coordinates[trends.index]
+    limit = trends['Kemiringan'].abs().max() or 1
+
+    fig = go.Figure(go.Scattergeo(
+        lat=[lat for lat, _ in coordinates],
+        lon=[lon for _, lon in coordinates],
+        text=trends['Kab/Kota'],
+        mode='markers+text',
+        textposition='top center',
+        marker=dict(
+            size=18,
+            color=trends['Kemiringan'],
+            colorscale=get_color_scale(solid_colors['positive'], solid_colors['negative']),
+            cmin=-limit,
+            cmax=limit,
+            colorbar=dict(title='m (%/hari)'),
+            line=dict(width=1, color='white')
+        ),
+        customdata=trends[['Kemiringan', 'R²', 'Volatilitas']],
+        hovertemplate='<b>%{text}</b><br>Kemiringan: %{customdata[0]:.4f}%/hari<br>R²: %{customdata[1]:.2f}<br>σ: %{customdata[2]:.2f}<extra></extra>'
+    ))
+    fig.update_geos(fitbounds='locations', showcountries=True, showland=True, landcolor='#f2f2f2', resolution=50)
+    fig.update_layout(
+        title={'text': 'Peta Kemiringan Tren Perubahan Harga', 'font': {'size': 18, 'color': 'black', 'family': 'Arial, sans-serif'}},
+        height=500,
+        margin=dict(t=60, b=20, l=20, r=20)
+    )
+    return fig
+
+# Indeks terbalik komoditas (andil dan fluktuasi), dibangun sekali per versi data
+@st.cache_resource(max_entries=DATA_CACHE_ENTRIES)
+def load_commodity_index(dataset_key):
+    return analytics.build_commodity_index(load_data(dataset_key), load_commodity_data(dataset_key))
+
+@st.cache_data(max_entries=FIGURE_CACHE_ENTRIES, ttl=FIGURE_CACHE_TTL)
+def build_top_commodities_figure(dataset_key, districts, show_values, n=10):
+    top = load_commodity_index(dataset_key).top_commodities(n, districts)
+    if top.empty:
+        return None
+
+    return charts.top_commodities_figure(top, n, show_values)
+
+@st.cache_data(max_entries=FIGURE_CACHE_ENTRIES, ttl=FIGURE_CACHE_TTL)
+def build_commodity_comparison_figure(dataset_key, districts, commodities):
+    comparison = load_commodity_index(dataset_key).compare(commodities, districts, 'Bulanan')
+    if comparison.empty:
+        return None
+
+    fig = px.line(
+        comparison,
+        x='Periode',
+        y='Rata-rata Andil',
+        color='Komoditas',
+        markers=True,
+        title='Perbandingan Andil Komoditas per Bulan',
+        custom_data=['Komoditas', 'Total Andil', 'Kemunculan']
+    )
+    fig.update_traces(
+        hovertemplate='<b>%{customdata[0]}</b><br>%{x|%b %Y}<br>Rata-rata andil: %{y:.3f}<br>'
+                      'Total andil: %{customdata[1]:.2f} (%{customdata[2]} observasi)<extra></extra>'
+    )
+    fig.add_hline(y=0, line_dash="dash", line_color="gray", line_width=1)
+    fig.update_layout(
+        title_font=dict(size=24, color='black', family='Arial, sans-serif'),
+        xaxis=dict(tickformat='%b %Y', tickangle=-45),
+        plot_bgcolor='white',
+        height=500,
+        margin=dict(t=100, b=100, l=70, r=40),
+        hoverlabel=dict(bgcolor="white", font_size=14, font_family="Arial, sans-serif")
+    )
+    fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='lightgray')
+    return fig
+
+# Matriks andil padat kabupaten/kota x minggu x komoditas, dibangun sekali dari indeks komoditas
+@st.cache_resource(max_entries=DATA_CACHE_ENTRIES)
+def load_commodity_matrix(dataset_key):
+    return analytics.build_commodity_matrix(load_commodity_index(dataset_key))
+
+# Heatmap andil: kabupaten/kota x periode untuk satu komoditas, atau kabupaten/kota x komoditas
+# untuk satu minggu (period None berarti seluruh histori). Agregasi dilakukan di server sehingga
+# browser hanya menerima satu trace heatmap
+@st.cache_data(max_entries=FIGURE_CACHE_ENTRIES, ttl=FIGURE_CACHE_TTL)
+def build_commodity_heatmap_figure(dataset_key, districts, view, statistic, commodity=None, resolution='Mingguan', period=None):
+    commodity_matrix = load_commodity_matrix(dataset_key)
+    if view == 'Periode':
+        matrix = commodity_matrix.by_period(commodity, districts, resolution, statistic)
+        if matrix.empty:
+            return None
+        matrix.columns = analytics.format_period_label(matrix.columns.to_series(), resolution)
+        return charts.commodity_heatmap_figure(matrix, f'{statistic} {commodity} ({resolution})', statistic, 'Periode')
+
+    matrix = commodity_matrix.by_commodity(period, districts, statistic)
+    if matrix.empty:
+        return None
+    label = 'Seluruh Histori' if period is None else analytics.format_period_label(pd.Series([period]), 'Mingguan').iloc[0]
+    return charts.commodity_heatmap_figure(matrix, f'{statistic} per Komoditas ({label})', statistic, 'Komoditas')
+
+# Metrik yang dapat dipantau sebagai sinyal rolling
+ROLLING_METRICS = {
+    "Perubahan Harga": 'Indikator Perubahan Harga (%)',
+    "Disparitas Harga": 'Disparitas Harga Antar Daerah',
+}
+
+# Hasil rolling terakhir per seleksi partisi dipertahankan antar versi data, sehingga rilis
+# mingguan baru hanya menghitung minggu barunya (lihat analytics.rolling_statistics)
+@st.cache_resource
+def rolling_state():
+    return {'lock': threading.Lock(), 'results': {}}
+
+# Hasil sebelumnya hanya dipakai bila seleksi provinsi/tahunnya sama
+def _update_rolling_state(name, dataset_key, compute):
+    state = rolling_state()
+    selection = dataset_key[1:]
+    with state['lock']:
+        previous_selection, previous = state['results'].get(name, (None, None))
+        result = compute(previous if previous_selection == selection else None)
+        state['results'][name] = (selection, result)
+    return result
+
+@st.cache_resource(max_entries=DATA_CACHE_ENTRIES)
+def load_rolling_statistics(dataset_key, metric):
+    cube = load_aggregate_cube(dataset_key)
+    return _update_rolling_state(
+        metric, dataset_key, lambda previous: analytics.rolling_statistics(cube, metric, previous=previous)
+    )
+
+@st.cache_resource(max_entries=DATA_CACHE_ENTRIES)
+def load_provincial_disparity(dataset_key):
+    cube = load_aggregate_cube(dataset_key)
+    return _update_rolling_state(
+        'provinsi', dataset_key, lambda previous: analytics.provincial_disparity(cube, previous=previous)
+    )
+
+@st.cache_data(max_entries=FIGURE_CACHE_ENTRIES, ttl=FIGURE_CACHE_TTL)
+def build_rolling_figure(dataset_key, districts, metric_label, window):
+    rolling = analytics.select_districts(load_rolling_statistics(dataset_key, ROLLING_METRICS[metric_label]), districts)
+    if rolling.empty:
+        return None
+
+    fig = go.Figure()
+    colors = px.colors.qualitative.Plotly
+    for i, (district, series) in enumerate(rolling.groupby('Kab/Kota', sort=False)):
+        color = colors[i % len(colors)]
+        fig.add_trace(go.Scatter(
+            x=series['Periode_Minggu'], y=series[f'Rata-rata {window}m'],
+            name=f'{district} (rata-rata)', legendgroup=district, line=dict(color=color, width=3),
+            customdata=series[[f'Std {window}m', f'Min {window}m', f'Max {window}m', 'Nilai']],
+            hovertemplate=f'<b>{district}</b><br>%{{x|%d %b %Y}}<br>Rata-rata {window} minggu: %{{y:.2f}}<br>'
+                          'σ: %{customdata[0]:.2f}<br>Min/Max: %{customdata[1]:.2f} / %{customdata[2]:.2f}<br>'
+                          'Nilai minggu ini: %{customdata[3]:.2f}<extra></extra>'
+        ))
+        fig.add_trace(go.Scatter(
+            x=series['Periode_Minggu'], y=series[f'EWMA {window}m'],
+            name=f'{district} (EWMA)', legendgroup=district, line=dict(color=color, width=2, dash='dot'),
+            hovertemplate=f'<b>{district}</b><br>%{{x|%d %b %Y}}<br>EWMA {window} minggu: %{{y:.2f}}<extra></extra>'
+        ))
+
+    fig.update_layout(
+        title={'text': f'{metric_label}: Rata-rata Bergerak dan EWMA {window} Minggu',
+               'font': {'size': 24, 'color': 'black', 'family': 'Arial, sans-serif'}},
+        xaxis=dict(tickformat='%d %b %Y', tickangle=-45),
+        plot_bgcolor='white',
+        height=600,
+        margin=dict(t=100, b=100, l=70, r=40),
+        hoverlabel=dict(bgcolor="white", font_size=14, font_family="Arial, sans-serif")
+    )
+    fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='lightgray')
+    fig.update_xaxes(rangeslider_visible=True)
+    return fig
+
+@st.cache_data(max_entries=FIGURE_CACHE_ENTRIES, ttl=FIGURE_CACHE_TTL)
+def build_provincial_disparity_figure(dataset_key):
+    disparity = load_provincial_disparity(dataset_key).dropna(subset=['Indeks Disparitas'])
+    if disparity.empty:
+        return None
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=disparity['Periode'], y=disparity['Indeks Disparitas'], mode='markers', name='Mingguan',
+        marker=dict(color=solid_colors['highlight'], size=6, opacity=0.5),
+        customdata=disparity[['Kabupaten/Kota', 'Sebaran Perubahan Harga', 'Rentang Perubahan Harga']],
+        hovertemplate='%{x|%d %b %Y}<br>Indeks: %{y:.2f}<br>%{customdata[0]} kabupaten/kota<br>'
+                      'Sebaran perubahan harga: %{customdata[1]:.2f}<br>Rentang: %{customdata[2]:.2f}<extra></extra>'
+    ))
+    for window, width in zip(analytics.ROLLING_WINDOWS, (2, 4)):
+        fig.add_trace(go.Scatter(
+            x=disparity['Periode'], y=disparity[f'Indeks Disparitas {window}m'], mode='lines',
+            name=f'Rata-rata {window} minggu', line=dict(color=solid_colors['highlight'], width=width,
+                                                         dash='dot' if width == 2 else 'solid'),
+            hovertemplate=f'%{{x|%d %b %Y}}<br>Rata-rata {window} minggu: %{{y:.2f}}<extra></extra>'
+        ))
+    fig.update_layout(
+        title={'text': 'Indeks Disparitas Harga Provinsi', 'font': {'size': 24, 'color': 'black', 'family': 'Arial, sans-serif'}},
+        yaxis_title='Disparitas Harga (%)',
+        xaxis=dict(tickformat='%d %b %Y', tickangle=-45),
+        plot_bgcolor='white',
+        height=500,
+        margin=dict(t=100, b=100, l=70, r=40),
+        hoverlabel=dict(bgcolor="white", font_size=14, font_family="Arial, sans-serif")
+    )
+    fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='lightgray')
+    return fig
+
+# Instrumentasi per rerun; mode detail (memori puncak, payload figure) mengikuti panel debug di sidebar.
+# Recorder rerun yang sedang berjalan disimpan per sesi, karena rerun fragmen membuat recorder sendiri
+def start_recorder():
+    st.session_state['recorder'] = metrics.Recorder(detailed=st.session_state.get('debug_panel', False))
+    return st.session_state['recorder']
+
+recorder = start_recorder()
+
+# Tampilkan figure Plotly dan catat ukuran payload-nya pada bagian yang sedang diukur
+def show_chart(fig):
+    st.session_state['recorder'].add_figure(fig)
+    st.plotly_chart(fig, use_container_width=True)
+
+# Sidebar filters
+st.sidebar.title("Filter Data")
+
+# Provinsi dan tahun menentukan partisi yang dibaca; seleksi yang mencakup semua nilai dibaca sebagai "semua"
+data_version = data_store.data_version(data_store.DATA_FILE)
+try:
+    partitions = load_partition_values(data_version)
+except Exception as e:
+    show_load_error(e)
+all_provinces = sorted(partitions['Provinsi'].unique().tolist())
+selected_provinces = st.sidebar.multiselect(
+    "Pilih Provinsi",
+    options=all_provinces,
+    default=all_provinces[:1]
+)
+all_years = sorted(partitions.loc[partitions['Provinsi'].isin(selected_provinces or all_provinces), 'Tahun'].unique().tolist())
+selected_years = st.sidebar.multiselect(
+    "Pilih Tahun",
+    options=all_years,
+    default=all_years
+)
+region = region_label(selected_provinces, all_provinces)
+dataset_key = (
+    data_version,
+    tuple(selected_provinces) if set(selected_provinces) != set(all_provinces) else (),
+    tuple(selected_years) if set(selected_years) != set(all_years) else (),
+)
+
+with recorder.measure("Muat data"):
+    try:
+        df = load_data(dataset_key)
+        commodity_long_df = load_commodity_data(dataset_key)
+        aggregate_cube = load_aggregate_cube(dataset_key)
+    except Exception as e:
+        show_load_error(e)
+    recorder.add_rows(len(df))
+
+# District selection (multi-select)
+all_districts = df['Kab/Kota'].unique().tolist()
+selected_districts = st.sidebar.multiselect(
+    "Pilih Kabupaten/Kota",
+    options=all_districts,
+    default=all_districts
+)
+
+# Opsi tampilan
+st.sidebar.title("Opsi Tampilan")
+show_values = st.sidebar.checkbox("Tampilkan Nilai pada Grafik", value=True)
+district_statistic = st.sidebar.selectbox(
+    "Statistik per Kabupaten/Kota",
+    analytics.DISTRICT_STATISTICS,
+    help="Grafik batang menampilkan satu nilai per kabupaten/kota: minggu terbaru, rata-rata, atau maksimum seluruh periode."
+)
+show_debug_panel = st.sidebar.checkbox(
+    "Panel debug performa",
+    key='debug_panel',
+    help="Tampilkan waktu, memori puncak, jumlah baris, dan ukuran payload figure per bagian untuk rerun ini."
+)
+# Panel debug diisi di akhir rerun penuh dan ditimpa oleh rerun fragmen
+debug_placeholder = st.sidebar.empty() if show_debug_panel else None
+
+# Filter data based on selection: hanya label baris yang disimpan, kolom tidak disalin.
+# Kolom diambil dari df saat benar-benar dibutuhkan (halaman tabel, ekspor)
+filtered_rows = analytics.filter_rows(df, selected_districts)
+filtered_cube = analytics.select_districts(aggregate_cube, selected_districts)
+
+# Bagian ber-@st.fragment: interaksi widget di dalamnya hanya menjalankan ulang bagian itu,
+# bukan seluruh skrip (butuh Streamlit >= 1.37, lihat requirements.txt)
+
+# Pasang di bawah @st.fragment. Dalam rerun penuh, waktu fragmen sudah tercatat pada bagian induknya.
+# Rerun fragmen saja membuat recorder baru, sehingga hasilnya tetap masuk log, registry Prometheus,
+# dan panel debug dengan nama bagian "<section> (fragmen)"
+def measured_fragment(section):
+    def decorate(render):
+        @functools.wraps(render)
+        def fragment():
+            if st.session_state['recorder'].active:
+                render()
+                return
+            recorder = start_recorder()
+            with recorder.measure(f"{section} (fragmen)", rows=len(filtered_rows)):
+                render()
+            recorder.flush()
+            if debug_placeholder is not None:
+                render_debug_panel(recorder)
+        return fragment
+    return decorate
+
+def render_summary():
+    st.header("Ringkasan")
+    # Dihitung dari cube agregat, bukan dari baris mentah
+    price_summary = analytics.summarize_cube(filtered_cube)
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        # Handle potential NaN values in the mean calculation
+        if price_summary is None:
+            st.metric("Rata-rata Perubahan Harga", "Data tidak tersedia")
+        else:
+            st.metric("Rata-rata Perubahan Harga", f"{price_summary['mean']:.2f}%")
+    with col2:
+        # Handle potential NaN values or empty DataFrame
+        if price_summary is None:
+            st.metric("Perubahan Harga Tertinggi", "Data tidak tersedia")
+        else:
+            st.metric("Perubahan Harga Tertinggi", f"{price_summary['max']:.2f}%", f"{price_summary['max_district']}")
+    with col3:
+        # Handle potential NaN values or empty DataFrame
+        if price_summary is None:
+            st.metric("Perubahan Harga Terendah", "Data tidak tersedia")
+        else:
+            st.metric("Perubahan Harga Terendah", f"{price_summary['min']:.2f}%", f"{price_summary['min_district']}")
+    with col4:
+        # Volatilitas (standar deviasi) sesuai metodologi di README
+        if price_summary is None:
+            st.metric("Volatilitas (σ)", "Data tidak tersedia")
+        else:
+            st.metric("Volatilitas (σ)", f"{price_summary['std']:.2f}")
+
+def render_price_change():
+    st.header("Perubahan Harga per Kabupaten/Kota")
+
+    # Create an interactive bar chart using Plotly (one bar per district)
+    fig = build_price_change_figure(dataset_key, district_key, district_statistic, show_values)
+    if fig is not None:
         # Display the chart
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig)
+        
+        with st.expander("Distribusi perubahan harga per Kabupaten/Kota"):
+            show_chart(
+                build_district_distribution_figure(
+                    dataset_key, district_key, 'Indikator Perubahan Harga (%)',
+                    'Distribusi Perubahan Harga', 'Perubahan Harga (%)', solid_colors['positive']
+                )
+            )
+    else:
+        st.warning("Tidak ada data yang cukup untuk visualisasi perubahan harga.")
+
+def render_disparity():
+    st.header("Disparitas Harga Antar Daerah")
+
+    # Create a more attractive bar chart for price disparity using Plotly (one bar per district)
+    if filtered_cube['Disparitas Harga Antar Daerah|count'].sum() > 0:
+        fig = build_disparity_figure(dataset_key, district_key, district_statistic, show_values)
+        
+        if fig is not None:
+            # Display the chart
+            show_chart(fig)
+            
+            with st.expander("Distribusi disparitas harga per Kabupaten/Kota"):
+                show_chart(
+                    build_district_distribution_figure(
+                        dataset_key, district_key, 'Disparitas Harga Antar Daerah',
+                        'Distribusi Disparitas Harga', 'Disparitas Harga (%)', solid_colors['highlight']
+                    )
+                )
+        else:
+            st.warning("Tidak ada data disparitas harga yang tersedia.")
     else:
-        st.warning("Tidak ada data disparitas harga yang tersedia.")
-else:
-    st.warning("Tidak ada data yang cukup untuk visualisasi disparitas harga.")
-
-# Commodity contribution analysis
-st.header("Analisis Komoditas Utama")
-
-# Check if the column exists
-commodity_column = None
-for col in df.columns:
-    if 'Komoditas Andil' in col:
-        commodity_column = col
-        break
-
-if commodity_column is None:
-    st.error("Kolom 'Komoditas Andil Perubahan Harga' tidak ditemukan dalam data.")
-else:
-    # Extract main commodities from the data
-    commodities = []
-    for item in filtered_df[commodity_column]:
-        if pd.notna(item):  # Check if the value is not NaN
-            for commodity in str(item).split(';'):
-                if '(' in commodity:
-                    name = commodity.split('(')[0].strip()
-                    if name not in commodities and name:
-                        commodities.append(name)
+        st.warning("Tidak ada data yang cukup untuk visualisasi disparitas harga.")
+
+@st.fragment
+@measured_fragment("Komoditas")
+def render_commodity():
+    st.header("Analisis Komoditas Utama")
+
+    # Check if the column exists
+    if 'Komoditas Andil Perubahan Harga' not in df.columns:
+        st.error("Kolom 'Komoditas Andil Perubahan Harga' tidak ditemukan dalam data.")
+        return
+
+    # Daftar komoditas diambil dari tabel panjang yang sudah diparse saat load
+    commodities = analytics.list_commodities(commodity_long_df, district_key)
 
     if commodities:
         selected_commodity = st.selectbox("Pilih Komoditas", commodities)
 
-        # Create a function to check if a commodity is in the list and extract its value
-        def get_commodity_value(commodity_string, target):
-            if pd.isna(commodity_string):
-                return 0
-            for item in str(commodity_string).split(';'):
-                if target in item:
-                    try:
-                        value = float(item.split('(')[1].split(')')[0])
-                        return value
-                    except:
-                        return 0
-            return 0
-
-        # Create a new dataframe with the contribution of the selected commodity
-        commodity_data = []
-        for _, row in filtered_df.iterrows():
-            value = get_commodity_value(row[commodity_column], selected_commodity)
-            commodity_data.append({
-                'Kab/Kota': row['Kab/Kota'],
-                'Kontribusi': value,
-                'Indikator Perubahan Harga (%)': row['Indikator Perubahan Harga (%)'],
-                'Bulan_Nama': row['Bulan_Nama'],
-                'Tahun': row['Tahun']
-            })
-
-        commodity_df = pd.DataFrame(commodity_data)
-        
         # Create a more attractive visualization for commodity contribution using Plotly
-        if not commodity_df.empty and not commodity_df['Kontribusi'].isna().all() and not (commodity_df['Kontribusi'] == 0).all():
-            # Sort data for better visualization
-            sorted_commodity_df = commodity_df.sort_values('Kontribusi', ascending=False)
-            
-            # Create color array based on values with saturation
-            positive_values = sorted_commodity_df['Kontribusi'] >= 0
-            negative_values = sorted_commodity_df['Kontribusi'] < 0
-            
-            positive_colors = get_color_scale(sorted_commodity_df.loc[positive_values, 'Kontribusi'], solid_colors['positive'])
-            negative_colors = get_color_scale(sorted_commodity_df.loc[negative_values, 'Kontribusi'], solid_colors['negative'], is_negative=True)
-            
-            # Combine colors
-            colors = []
-            pos_idx = 0
-            neg_idx = 0
-            for val in sorted_commodity_df['Kontribusi']:
-                if val >= 0:
-                    colors.append(positive_colors[pos_idx] if pos_idx < len(positive_colors) else solid_colors['positive'])
-                    pos_idx += 1
-                else:
-                    colors.append(negative_colors[neg_idx] if neg_idx < len(negative_colors) else solid_colors['negative'])
-                    neg_idx += 1
-            
-            # Create interactive bar chart with Plotly
-            fig = go.Figure()
-            
-            # Add bars
-            fig.add_trace(go.Bar(
-                x=sorted_commodity_df['Kab/Kota'],
-                y=sorted_commodity_df['Kontribusi'],
-                marker_color=colors,
-                text=[f"{x:.2f}" for x in sorted_commodity_df['Kontribusi']] if show_values else None,
-                textposition='outside',
-                hovertemplate='<b>%{x}</b><br>Kontribusi: %{y:.2f}<br>Perubahan Harga: %{customdata[0]:.2f}%<br>Bulan: %{customdata[1]}<br>Tahun: %{customdata[2]}<extra></extra>',
-                customdata=sorted_commodity_df[['Indikator Perubahan Harga (%)', 'Bulan_Nama', 'Tahun']]
-            ))
-            
-            # Update layout
-            fig.update_layout(
-                title={
-                    'text': f'Kontribusi {selected_commodity} terhadap Perubahan Harga',
-                    'font': {'size': 24, 'color': 'black', 'family': 'Arial, sans-serif'}
-                },
-                xaxis_title={
-                    'text': 'Kabupaten/Kota',
-                    'font': {'size': 16, 'color': 'black', 'family': 'Arial, sans-serif'}
-                },
-                yaxis_title={
-                    'text': 'Kontribusi',
-                    'font': {'size': 16, 'color': 'black', 'family': 'Arial, sans-serif'}
-                },
-                xaxis={'categoryorder': 'total descending', 'tickangle': -45},
-                plot_bgcolor='white',
-                height=600,
-                margin=dict(t=100, b=100, l=70, r=40),
-                hoverlabel=dict(bgcolor="white", font_size=14, font_family="Arial, sans-serif"),
-                uniformtext_minsize=10,
-                uniformtext_mode='hide'
-            )
-            
-            # Adjust y-axis range to accommodate text labels
-            max_val = sorted_commodity_df['Kontribusi'].max()
-            min_val = sorted_commodity_df['Kontribusi'].min()
-            padding = (max_val - min_val) * 0.15  # Add 15% padding
-            
-            fig.update_yaxes(
-                showgrid=True,
-                gridwidth=1,
-                gridcolor='lightgray',
-                range=[min_val - padding if min_val < 0 else min_val * 0.9, max_val * 1.15]
-            )
-            
+        fig = build_commodity_figure(dataset_key, district_key, selected_commodity, show_values)
+        if fig is not None:
             # Display the chart
-            st.plotly_chart(fig, use_container_width=True)
+            show_chart(fig)
         else:
             st.warning(f"Tidak ada data kontribusi yang tersedia untuk {selected_commodity}.")
     else:
         st.warning("Tidak ada data komoditas yang tersedia.")
+        return
 
-# Time series analysis
-st.header("Analisis Tren Perubahan Harga")
+    commodity_index = load_commodity_index(dataset_key)
 
-# Pilihan tampilan tren
-trend_view = st.radio(
-    "Tampilkan tren untuk:",
-    ["Kalimantan Barat (Agregat)", "Per Kabupaten/Kota"],
-    horizontal=True
-)
+    # Minggu saat komoditas menjadi andil terbesar atau tercatat sebagai fluktuasi tertinggi
+    postings = commodity_index.lookup(selected_commodity, districts=district_key)
+    highlights = postings[(postings['Peringkat'] == 1) | (postings['Sumber'] == 'Fluktuasi')]
+    with st.expander(f"Kemunculan {selected_commodity} sebagai andil teratas atau fluktuasi tertinggi"):
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Andil teratas", f"{(highlights['Sumber'] == 'Andil').sum()} kali")
+        with col2:
+            st.metric("Fluktuasi tertinggi", f"{(highlights['Sumber'] == 'Fluktuasi').sum()} kali")
+        st.dataframe(
+            highlights[['Kab/Kota', 'Periode_Minggu', 'Sumber', 'Andil', 'Peringkat']].sort_values('Periode_Minggu', ascending=False),
+            hide_index=True,
+            use_container_width=True,
+            column_config={'Periode_Minggu': st.column_config.DateColumn("Minggu", format="DD MMM YYYY")}
+        )
+
+    fig = build_top_commodities_figure(dataset_key, district_key, show_values)
+    if fig is not None:
+        show_chart(fig)
+
+    # Perbandingan beberapa komoditas; default tiga komoditas dengan total andil terbesar
+    top_names = commodity_index.top_commodities(3, district_key).index.tolist()
+    compared = st.multiselect("Bandingkan komoditas", commodities, default=[name for name in top_names if name in commodities])
+    if compared:
+        fig = build_commodity_comparison_figure(dataset_key, district_key, tuple(compared))
+        if fig is not None:
+            show_chart(fig)
+
+    # Matriks andil: seluruh kabupaten/kota dan periode/komoditas dalam satu heatmap
+    st.subheader("Matriks Andil")
+    heatmap_views = {
+        f"Kabupaten/Kota × Periode ({selected_commodity})": 'Periode',
+        "Kabupaten/Kota × Komoditas": 'Komoditas',
+    }
+    col1, col2 = st.columns(2)
+    with col1:
+        heatmap_view = heatmap_views[st.radio("Tampilan matriks:", list(heatmap_views), horizontal=True)]
+    with col2:
+        heatmap_statistic = st.radio("Nilai sel:", analytics.MATRIX_STATISTICS, horizontal=True)
+    if heatmap_view == 'Periode':
+        heatmap_resolution = st.radio("Resolusi matriks:", list(analytics.TREND_RESOLUTIONS), horizontal=True)
+        fig = build_commodity_heatmap_figure(dataset_key, district_key, heatmap_view, heatmap_statistic,
+                                             commodity=selected_commodity, resolution=heatmap_resolution)
+    else:
+        periods = load_commodity_matrix(dataset_key).periods[::-1]
+        period_options = {"Seluruh histori": None}
+        period_options.update(zip(analytics.format_period_label(periods.to_series(), 'Mingguan'), periods))
+        heatmap_period = period_options[st.selectbox("Minggu", list(period_options))]
+        fig = build_commodity_heatmap_figure(dataset_key, district_key, heatmap_view, heatmap_statistic, period=heatmap_period)
+    if fig is not None:
+        show_chart(fig)
+    else:
+        st.info("Tidak ada andil yang tercatat untuk tampilan matriks ini.")
+
+@st.fragment
+@measured_fragment("Tren")
+def render_trend():
+    st.header("Analisis Tren Perubahan Harga")
+
+    # Pilihan tampilan tren
+    trend_view = st.radio(
+        "Tampilkan tren untuk:",
+        [TREND_AGGREGATE, "Per Kabupaten/Kota"],
+        format_func=lambda view: f"{region} (Agregat)" if view == TREND_AGGREGATE else view,
+        horizontal=True
+    )
+    trend_resolution = st.radio(
+        "Resolusi waktu:",
+        list(analytics.TREND_RESOLUTIONS),
+        index=1,
+        horizontal=True
+    )
+
+    # Group by period and calculate average price change
+    if len(filtered_rows) == 0:
+        st.warning("Tidak ada data yang cukup untuk analisis tren.")
+        return
 
-# Group by date and calculate average price change
-if not filtered_df.empty:
     # Check if we have enough time periods for analysis
-    time_periods = filtered_df['Tanggal'].nunique()
-    
-    if time_periods > 1:
-        if trend_view == "Kalimantan Barat (Agregat)":
-            # Group by date and calculate average for all districts
-            time_series_df = filtered_df.groupby('Tanggal')['Indikator Perubahan Harga (%)'].mean().reset_index()
-            time_series_df['Bulan_Tahun'] = time_series_df['Tanggal'].dt.strftime('%b %Y')
-            
-            # Sort by date
-            time_series_df = time_series_df.sort_values('Tanggal')
-            
-            # Create interactive line chart with Plotly
-            fig = px.line(
-                time_series_df, 
-                x='Tanggal', 
-                y='Indikator Perubahan Harga (%)',
-                markers=True,
-                labels={
-                    'Tanggal': 'Periode',
-                    'Indikator Perubahan Harga (%)': 'Rata-rata Perubahan Harga (%)'
-                },
-                title='Tren Perubahan Harga Kalimantan Barat',
-                custom_data=['Bulan_Tahun']
-            )
-            
-            # Update trace
-            fig.update_traces(
-                line=dict(color=solid_colors['positive'], width=4),
-                marker=dict(size=12, color=solid_colors['positive']),
-                hovertemplate='<b>%{customdata[0]}</b><br>Perubahan: %{y:.2f}%<extra></extra>'
-            )
-            
-            # Add text labels if show_values is True
-            if show_values:
-                fig.update_traces(
-                    text=[f"{y:.2f}%" for y in time_series_df['Indikator Perubahan Harga (%)']],
-                    textposition="top center",
-                    mode='lines+markers+text'
-                )
-            
-            # Add horizontal line at y=0
-            fig.add_hline(
-                y=0,
-                line_dash="dash",
-                line_color="gray",
-                line_width=2
-            )
-            
-            # Update layout
-            fig.update_layout(
-                font=dict(family="Arial, sans-serif"),
-                title_font=dict(size=24, color='black'),
-                xaxis_title_font=dict(size=16, color='black'),
-                yaxis_title_font=dict(size=16, color='black'),
-                xaxis=dict(tickformat='%b %Y', tickangle=-45),
-                plot_bgcolor='white',
-                height=600,
-                margin=dict(t=100, b=100, l=70, r=40),
-                hoverlabel=dict(bgcolor="white", font_size=14, font_family="Arial, sans-serif")
-            )
-            
-            # Add grid lines
-            fig.update_yaxes(
-                showgrid=True,
-                gridwidth=1,
-                gridcolor='lightgray'
+    time_periods = analytics.get_period_key(filtered_cube, trend_resolution).nunique()
+    if time_periods <= 1:
+        st.info("Diperlukan lebih dari satu periode waktu untuk analisis tren.")
+        return
+
+    if trend_view == TREND_AGGREGATE:
+        fig = build_trend_figure(dataset_key, district_key, trend_resolution, show_values, False, region)
+        
+        # Display the chart
+        show_chart(fig)
+        
+    else:  # Per Kabupaten/Kota
+        # Pilih kabupaten/kota untuk ditampilkan (maksimal 5)
+        if len(selected_districts) > 5:
+            st.warning("Menampilkan terlalu banyak kabupaten/kota dapat membuat grafik sulit dibaca. Silakan pilih maksimal 5 kabupaten/kota.")
+            districts_for_trend = st.multiselect(
+                "Pilih maksimal 5 kabupaten/kota untuk ditampilkan:",
+                options=selected_districts,
+                default=selected_districts[:5] if len(selected_districts) > 5 else selected_districts
             )
+        else:
+            districts_for_trend = selected_districts
+        
+        if districts_for_trend:
+            fig = build_trend_figure(dataset_key, tuple(districts_for_trend), trend_resolution, show_values, True, region)
             
             # Display the chart
-            st.plotly_chart(fig, use_container_width=True)
-            
-        else:  # Per Kabupaten/Kota
-            # Pilih kabupaten/kota untuk ditampilkan (maksimal 5)
-            if len(selected_districts) > 5:
-                st.warning("Menampilkan terlalu banyak kabupaten/kota dapat membuat grafik sulit dibaca. Silakan pilih maksimal 5 kabupaten/kota.")
-                districts_for_trend = st.multiselect(
-                    "Pilih maksimal 5 kabupaten/kota untuk ditampilkan:",
-                    options=selected_districts,
-                    default=selected_districts[:5] if len(selected_districts) > 5 else selected_districts
-                )
-            else:
-                districts_for_trend = selected_districts
-            
-            if districts_for_trend:
-                # Filter data for selected districts
-                trend_df = filtered_df[filtered_df['Kab/Kota'].isin(districts_for_trend)]
-                
-                # Create interactive line chart with Plotly Express
-                fig = px.line(
-                    trend_df.sort_values('Tanggal'), 
-                    x='Tanggal', 
-                    y='Indikator Perubahan Harga (%)',
-                    color='Kab/Kota',
-                    markers=True,
-                    labels={
-                        'Tanggal': 'Periode',
-                        'Indikator Perubahan Harga (%)': 'Perubahan Harga (%)',
-                        'Kab/Kota': 'Kabupaten/Kota'
-                    },
-                    title='Tren Perubahan Harga per Kabupaten/Kota',
-                    custom_data=['Kab/Kota', 'Bulan_Nama', 'Tahun']
-                )
-                
-                # Update traces
-                fig.update_traces(
-                    line=dict(width=3),
-                    marker=dict(size=10),
-                    hovertemplate='<b>%{customdata[0]}</b><br>Perubahan: %{y:.2f}%<br>%{customdata[1]} %{customdata[2]}<extra></extra>'
-                )
-                
-                # Add text labels if show_values is True
-                if show_values:
-                    fig.update_traces(
-                        text=[f"{y:.2f}%" for y in trend_df['Indikator Perubahan Harga (%)']],
-                        textposition="top center",
-                        mode='lines+markers+text'
-                    )
-                
-                # Add horizontal line at y=0
-                fig.add_hline(
-                    y=0,
-                    line_dash="dash",
-                    line_color="gray",
-                    line_width=2
-                )
-                
-                # Update layout
-                fig.update_layout(
-                    font=dict(family="Arial, sans-serif"),
-                    title_font=dict(size=24, color='black'),
-                    xaxis_title_font=dict(size=16, color='black'),
-                    yaxis_title_font=dict(size=16, color='black'),
-                    xaxis=dict(tickformat='%b %Y', tickangle=-45),
-                    plot_bgcolor='white',
-                    height=600,
-                    margin=dict(t=100, b=100, l=70, r=40),
-                    hoverlabel=dict(bgcolor="white", font_size=14, font_family="Arial, sans-serif"),
-                    legend=dict(
-                        orientation="h",
-                        yanchor="bottom",
-                        y=1.02,
-                        xanchor="right",
-                        x=1
-                    )
-                )
-                
-                # Add grid lines
-                fig.update_yaxes(
-                    showgrid=True,
-                    gridwidth=1,
-                    gridcolor='lightgray'
-                )
-                
-                # Display the chart
-                st.plotly_chart(fig, use_container_width=True)
-            else:
-                st.warning("Silakan pilih minimal satu kabupaten/kota untuk melihat tren.")
+            show_chart(fig)
+        else:
+            st.warning("Silakan pilih minimal satu kabupaten/kota untuk melihat tren.")
+
+@st.fragment
+@measured_fragment("Sinyal Rolling")
+def render_rolling():
+    st.header("Sinyal Rolling")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        metric_label = st.radio("Metrik:", list(ROLLING_METRICS), horizontal=True)
+    with col2:
+        window_labels = {f"{window} minggu": window for window in analytics.ROLLING_WINDOWS}
+        window = window_labels[st.radio("Jendela:", list(window_labels), horizontal=True)]
+
+    # Sama seperti grafik tren per kabupaten/kota: maksimal 5 daerah agar grafik tetap terbaca
+    if len(selected_districts) > 5:
+        districts_for_rolling = st.multiselect(
+            "Pilih maksimal 5 kabupaten/kota untuk ditampilkan:",
+            options=selected_districts,
+            default=selected_districts[:5],
+            max_selections=5
+        )
     else:
-        st.info("Diperlukan lebih dari satu periode waktu untuk analisis tren.")
-else:
-    st.warning("Tidak ada data yang cukup untuk analisis tren.")
-
-# Data table
-st.header("Data Lengkap")
-st.dataframe(filtered_df)
-
-# Download data
-csv = filtered_df.to_csv(index=False).encode('utf-8')
-st.download_button(
-    label="Download Data CSV",
-    data=csv,
-    file_name=f"price_data_{'_'.join(selected_districts)}.csv",
-    mime="text/csv",
-)
+        districts_for_rolling = selected_districts
+
+    fig = build_rolling_figure(dataset_key, tuple(districts_for_rolling), metric_label, window) if districts_for_rolling else None
+    if fig is not None:
+        show_chart(fig)
+    else:
+        st.warning("Tidak ada data yang cukup untuk sinyal rolling.")
+
+    # Sinyal minggu terakhir per kabupaten/kota terpilih
+    rolling = analytics.select_districts(load_rolling_statistics(dataset_key, ROLLING_METRICS[metric_label]), district_key)
+    latest = rolling.groupby('Kab/Kota', sort=False).tail(1)
+    if not latest.empty:
+        st.dataframe(
+            latest[['Kab/Kota', 'Periode_Minggu', 'Nilai', f'Rata-rata {window}m', f'Std {window}m',
+                    f'Min {window}m', f'Max {window}m', f'EWMA {window}m']],
+            hide_index=True,
+            use_container_width=True,
+            column_config={'Periode_Minggu': st.column_config.DateColumn("Minggu terakhir", format="DD MMM YYYY")}
+        )
+
+    fig = build_provincial_disparity_figure(dataset_key)
+    if fig is not None:
+        show_chart(fig)
+    else:
+        st.info("Data disparitas provinsi belum tersedia.")
+
+# Format kolom tabel hasil regresi tren
+TREND_COLUMN_CONFIG = {
+    'Kemiringan': st.column_config.NumberColumn("Kemiringan (m)", format="%.4f", help="Perubahan per hari"),
+    'Intersep': st.column_config.NumberColumn("Intersep (b)", format="%.3f", help="Nilai tren pada awal jendela"),
+    'R²': st.column_config.NumberColumn("R²", format="%.3f"),
+    'Volatilitas': st.column_config.NumberColumn("Volatilitas (σ)", format="%.3f"),
+}
+
+@st.fragment
+@measured_fragment("Statistik Tren")
+def render_trend_statistics():
+    st.subheader("Kemiringan Tren dan Volatilitas")
+    st.caption("Regresi linier y = mx + b (x dalam hari sejak awal jendela) dan σ, diurutkan dari kenaikan tercepat.")
+    window_label = st.selectbox("Jendela regresi", list(analytics.TREND_WINDOWS))
+    window_weeks = analytics.TREND_WINDOWS[window_label]
+
+    district_tab, commodity_tab = st.tabs(["Per Kabupaten/Kota", "Per Komoditas (andil)"])
+    with district_tab:
+        district_trends = load_district_trends(dataset_key, district_key, window_weeks)
+        if district_trends.empty:
+            st.warning("Tidak ada data yang cukup untuk menghitung tren.")
+        else:
+            col1, col2 = st.columns([1, 1])
+            with col1:
+                st.dataframe(district_trends, column_config=TREND_COLUMN_CONFIG, use_container_width=True)
+            with col2:
+                fig = build_slope_map_figure(dataset_key, district_key, window_weeks)
+                if fig is not None:
+                    show_chart(fig)
+    with commodity_tab:
+        commodity_trends = load_commodity_trends(dataset_key, district_key, window_weeks)
+        if commodity_trends.empty:
+            st.warning("Tidak ada data komoditas yang tersedia.")
+        else:
+            st.dataframe(commodity_trends, column_config=TREND_COLUMN_CONFIG, use_container_width=True)
+
+def render_trend_section():
+    render_trend()
+    render_trend_statistics()
+
+# Hapus file unduhan yang lebih tua dari EXPORT_MAX_AGE, lalu yang terlama bila jumlahnya melebihi
+# EXPORT_MAX_FILES. File dari sesi yang sudah ditutup ikut terhapus; sesi aktif cukup menyiapkan ulang
+def cleanup_exports():
+    now = time.time()
+    files = []
+    for entry in os.scandir(EXPORT_DIR):
+        try:
+            files.append((entry.stat().st_mtime, entry.path))
+        except OSError:
+            continue
+    files.sort(reverse=True)
+    for position, (mtime, path) in enumerate(files):
+        if now - mtime > EXPORT_MAX_AGE or position >= EXPORT_MAX_FILES:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+# Tulis hasil unduhan ke file di EXPORT_DIR; hanya path yang disimpan di session state.
+# rows berupa posisi baris (index data partisi berisi id baris global, bukan posisi)
+def prepare_export(frame, rows, export_format):
+    previous = st.session_state.pop('export', None)
+    if previous is not None and os.path.exists(previous['path']):
+        os.remove(previous['path'])
 
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    cleanup_exports()
+    extension, _ = data_store.EXPORT_FORMATS[export_format]
+    fd, path = tempfile.mkstemp(suffix=f'.{extension}', dir=EXPORT_DIR)
+    with os.fdopen(fd, 'wb') as f:
+        data_store.export_frame(frame, f, export_format, rows=rows)
+    return path
 
+@st.fragment
+@measured_fragment("Unduhan")
+def render_export():
+    export_format = st.selectbox("Format unduhan", list(data_store.EXPORT_FORMATS))
+    extension, mime = data_store.EXPORT_FORMATS[export_format]
+    export_key = (dataset_key, district_key, export_format)
 
+    # Download data: file hanya dibuat bila diminta, bukan pada setiap rerun
+    if st.button("Siapkan File Unduhan"):
+        with st.spinner("Menyiapkan file..."):
+            st.session_state['export'] = {'key': export_key, 'path': prepare_export(df, df.index.get_indexer(filtered_rows), export_format)}
 
+    export = st.session_state.get('export')
+    if export is not None and export['key'] == export_key and os.path.exists(export['path']):
+        with open(export['path'], 'rb') as f:
+            st.download_button(
+                label=f"Download Data {export_format}",
+                data=f,
+                file_name=f"price_data_{'_'.join(selected_districts)}.{extension}",
+                mime=mime,
+            )
 
+@st.fragment
+@measured_fragment("Data Lengkap")
+def render_data_table():
+    st.header("Data Lengkap")
 
+    all_columns = list(df.columns)
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        search = st.text_input("Cari (Kab/Kota, komoditas)", "").strip()
+    with col2:
+        sort_column = st.selectbox("Urutkan berdasarkan", ['(tanpa urutan)'] + all_columns)
+    with col3:
+        ascending = st.radio("Arah", ["Naik", "Turun"], horizontal=True) == "Naik"
 
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        filter_column = st.selectbox("Filter kolom", ['(tanpa filter)'] + all_columns)
+    column_filter = None
+    with col2:
+        if filter_column != '(tanpa filter)':
+            values = df.loc[filtered_rows, filter_column]
+            if pd.api.types.is_numeric_dtype(values) and values.notna().any():
+                low, high = float(values.min()), float(values.max())
+                selected_range = st.slider("Rentang nilai", low, high, (low, high)) if low < high else (low, high)
+                column_filter = (filter_column, 'range', tuple(selected_range))
+            else:
+                options = sorted(values.dropna().astype(str).unique().tolist())
+                selected_values = st.multiselect("Nilai", options)
+                if selected_values:
+                    column_filter = (filter_column, 'in', tuple(selected_values))
 
+    visible_columns = st.multiselect(
+        "Kolom yang ditampilkan",
+        all_columns,
+        default=[col for col in all_columns if col not in analytics.TABLE_HIDDEN_COLUMNS]
+    )
+
+    row_order = load_table_order(
+        dataset_key, district_key, search, column_filter,
+        None if sort_column == '(tanpa urutan)' else sort_column, ascending
+    )
+    total_rows = len(row_order)
 
+    col1, col2 = st.columns(2)
+    with col1:
+        page_size = st.selectbox("Baris per halaman", TABLE_PAGE_SIZES)
+    with col2:
+        page_count = max(1, -(-total_rows // page_size))
+        # Key bergantung pada jumlah halaman agar halaman kembali ke 1 saat hasil filter berubah
+        page = st.number_input("Halaman", min_value=1, max_value=page_count, value=1, step=1, key=f"table_page_{page_count}")
+
+    # Hanya baris pada halaman aktif yang dikirim ke browser
+    start = (page - 1) * page_size
+    page_rows = row_order[start:start + page_size]
+    st.dataframe(df.loc[page_rows, visible_columns or all_columns], hide_index=True, use_container_width=True)
+    if total_rows:
+        st.caption(f"Menampilkan baris {start + 1}–{start + len(page_rows)} dari {total_rows} (halaman {page} dari {page_count})")
+    else:
+        st.caption("Tidak ada baris yang cocok.")
+
+    render_export()
+
+# Hasil instrumentasi rerun terakhir (penuh atau fragmen) di sidebar
+def render_debug_panel(recorder):
+    panel = debug_placeholder.container()
+    panel.title("Debug Performa")
+    # Kolom yang tidak diukur (None) menjadi NaN
+    records = pd.DataFrame(recorder.records).astype({'peak_bytes': 'float64', 'payload_bytes': 'float64'})
+    panel.dataframe(
+        pd.DataFrame({
+            'Bagian': records['section'],
+            'Waktu (ms)': (records['seconds'] * 1000).round(1),
+            'Memori puncak proses (KB)': (records['peak_bytes'] / 1024).round(1),
+            'Baris': records['rows'],
+            'Payload (KB)': (records['payload_bytes'] / 1024).round(1),
+        }),
+        hide_index=True,
+        use_container_width=True
+    )
+    panel.caption(f"Total {records['seconds'].sum() * 1000:.1f} ms. Pengukuran memori dan payload aktif selama panel ini dibuka. "
+                       "Memori puncak mencakup seluruh proses, termasuk sesi lain yang berjalan bersamaan.")
+
+# Bagian dashboard; hanya bagian yang sedang dibuka yang dihitung dan dirender
+SECTIONS = {
+    "Perubahan Harga": render_price_change,
+    "Disparitas Harga": render_disparity,
+    "Komoditas": render_commodity,
+    "Tren": render_trend_section,
+    "Sinyal Rolling": render_rolling,
+    "Data Lengkap": render_data_table,
+}
+
+# Main content
+st.title(f"Analisis Perubahan Harga di {region}")
+st.markdown(f"Dashboard ini menampilkan analisis perubahan harga komoditas di {region}")
 
+district_key = tuple(selected_districts)
 
+# Overview metrics (murah karena berasal dari cube, selalu ditampilkan)
+with recorder.measure("Ringkasan", rows=len(filtered_rows)):
+    render_summary()
 
+selected_section = st.radio("Tampilkan bagian:", list(SECTIONS), horizontal=True, label_visibility="collapsed")
+with recorder.measure(selected_section, rows=len(filtered_rows)):
+    SECTIONS[selected_section]()
 
+recorder.flush()
+if show_debug_panel:
+    render_debug_panel(recorder)
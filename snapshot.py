@@ -0,0 +1,200 @@
+"""Snapshot statis untuk tampilan yang paling sering dibuka.
+
+Untuk setiap minggu terpilih dan setiap cakupan (seluruh provinsi dan setiap
+kabupaten/kota) ditulis ringkasan minggu tersebut, grafik batang perubahan harga
+terbaru per kabupaten/kota, dan komoditas dengan andil terbesar pada minggu itu.
+Perhitungannya memakai ``analytics`` dan grafiknya memakai ``charts``, sama
+dengan dashboard. Cakupan dikerjakan paralel dengan process pool; setiap worker
+memuat cube dan indeks komoditas sekali dari cache kolumnar.
+
+    python snapshot.py --output-dir snapshots --periods 4 --formats html json
+
+Struktur keluaran::
+
+    snapshots/index.json, index.html, plotly.min.js
+    snapshots/<YYYY-MM-DD>/semua.{html,json,png}
+    snapshots/<YYYY-MM-DD>/<kabupaten-kota>.{html,json,png}
+
+Format PNG membutuhkan paket ``kaleido``.
+"""
+import argparse
+import html
+import importlib.util
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import pandas as pd
+import plotly.offline
+
+import analytics
+import charts
+import data_store
+
+FORMATS = ['html', 'json', 'png']
+DEFAULT_FORMATS = ['html', 'json']
+TOP_COMMODITIES = 10
+# Nama file untuk cakupan seluruh provinsi
+ALL_DISTRICTS = 'semua'
+PLOTLY_JS = 'plotly.min.js'
+
+# Cube dan indeks komoditas per proses worker, diisi oleh _init_worker
+_state = {}
+
+
+def district_slug(district):
+    if district is None:
+        return ALL_DISTRICTS
+    return re.sub(r'[^a-z0-9]+', '-', district.lower()).strip('-')
+
+
+def _init_worker(source):
+    pd.set_option('mode.copy_on_write', True)
+    _state['cube'] = analytics.load_aggregate_cube(source)
+    _state['index'] = analytics.build_commodity_index(analytics.load_data(source),
+                                                      analytics.load_commodity_table(source))
+
+
+# Ringkasan, perbandingan wilayah dan komoditas teratas untuk satu cakupan pada minggu `period`
+def build_view(cube, commodity_index, period, district=None, n=TOP_COMMODITIES):
+    districts = None if district is None else [district]
+    week = analytics.select_districts(cube[cube['Periode_Minggu'] == period], districts)
+    summary = analytics.summarize_cube(week)
+    # Nilai terbaru per kabupaten/kota sampai minggu tersebut, seperti grafik batang "Terbaru"
+    bars = analytics.reduce_by_district(cube[cube['Periode_Minggu'] <= period], analytics.PRICE_CHANGE, 'Terbaru')
+    top = commodity_index.top_commodities(n, districts, period=period)
+    return {
+        'Periode': period.strftime('%Y-%m-%d'),
+        'Label_Periode': analytics.format_period_label(pd.Series([period]), 'Mingguan').iloc[0],
+        'Kab/Kota': district,
+        'Ringkasan': None if summary is None else {key: analytics.output_value(value) for key, value in summary.items()},
+        # Float dibulatkan ke presisi float32 penyimpanannya agar JSON tidak membawa derau pelebaran
+        'Perbandingan Wilayah': analytics.round_output(bars).to_dict('records'),
+        'Komoditas Teratas': analytics.round_output(top.reset_index()).to_dict('records'),
+    }, bars, top
+
+
+def _figures(view, bars, top):
+    figures = []
+    if not bars.empty:
+        figures.append(charts.price_change_figure(bars, 'Terbaru', True, highlight=view['Kab/Kota']))
+    if not top.empty:
+        figures.append(charts.top_commodities_figure(top, len(top), True))
+    return figures
+
+
+def _summary_html(view):
+    summary = view['Ringkasan']
+    if summary is None:
+        return '<p>Data tidak tersedia.</p>'
+    rows = [
+        ('Rata-rata Perubahan Harga', f"{summary['mean']:.2f}%"),
+        ('Perubahan Harga Tertinggi', f"{summary['max']:.2f}% ({summary['max_district']})"),
+        ('Perubahan Harga Terendah', f"{summary['min']:.2f}% ({summary['min_district']})"),
+        ('Volatilitas (σ)', f"{summary['std']:.2f}"),
+        ('Observasi', f"{summary['count']:.0f}"),
+    ]
+    cells = ''.join(f'<tr><th>{html.escape(label)}</th><td>{html.escape(value)}</td></tr>' for label, value in rows)
+    return f'<table>{cells}</table>'
+
+
+def _page_html(view, figures):
+    title = f"{view['Kab/Kota'] or 'Seluruh Kabupaten/Kota'} — {view['Label_Periode']}"
+    # plotly.js dimuat dari root snapshot, bukan disematkan di setiap halaman
+    plots = ''.join(fig.to_html(full_html=False, include_plotlyjs=f'../{PLOTLY_JS}' if i == 0 else False)
+                    for i, fig in enumerate(figures))
+    return (f'<!DOCTYPE html><html lang="id"><head><meta charset="utf-8"><title>{html.escape(title)}</title></head>'
+            f'<body><h1>{html.escape(title)}</h1><p><a href="../index.html">Semua snapshot</a></p>'
+            f'<h2>Ringkasan</h2>{_summary_html(view)}{plots}</body></html>')
+
+
+# Tulis semua minggu untuk satu cakupan; dijalankan di worker
+def write_district(output_dir, district, periods, formats):
+    written = []
+    for period in periods:
+        view, bars, top = build_view(_state['cube'], _state['index'], period, district)
+        period_dir = os.path.join(output_dir, view['Periode'])
+        os.makedirs(period_dir, exist_ok=True)
+        base = os.path.join(period_dir, district_slug(district))
+        figures = _figures(view, bars, top) if {'html', 'png'} & set(formats) else []
+        if 'json' in formats:
+            with open(f'{base}.json', 'w') as f:
+                json.dump(view, f, ensure_ascii=False, indent=1)
+        if 'html' in formats:
+            with open(f'{base}.html', 'w') as f:
+                f.write(_page_html(view, figures))
+        if 'png' in formats and figures:
+            # Satu gambar per cakupan: grafik perbandingan wilayah
+            figures[0].write_image(f'{base}.png', width=1200, height=600)
+        written.append(view['Periode'])
+    return district, written
+
+
+def _write_index(output_dir, manifest):
+    with open(os.path.join(output_dir, 'index.json'), 'w') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    if 'html' not in manifest['formats']:
+        return
+    items = []
+    for period in manifest['periods']:
+        links = ' · '.join(
+            f'<a href="{period}/{district_slug(district)}.html">{html.escape(district or "Semua")}</a>'
+            for district in [None] + manifest['districts']
+        )
+        items.append(f'<li><b>{period}</b>: {links}</li>')
+    with open(os.path.join(output_dir, 'index.html'), 'w') as f:
+        f.write('<!DOCTYPE html><html lang="id"><head><meta charset="utf-8"><title>Snapshot Harga</title></head>'
+                f'<body><h1>Snapshot Harga</h1><ul>{"".join(items)}</ul></body></html>')
+
+
+def run_snapshot(output_dir, source=data_store.DATA_FILE, periods=1, formats=DEFAULT_FORMATS, workers=None):
+    pd.set_option('mode.copy_on_write', True)
+    # Sinkronkan cache sekali di proses utama agar worker hanya membaca
+    cube = analytics.load_aggregate_cube(source)
+    analytics.load_commodity_table(source)
+    all_periods = pd.DatetimeIndex(cube['Periode_Minggu'].unique()).sort_values().tolist()
+    selected = all_periods if periods <= 0 else all_periods[-periods:]
+    districts = sorted(cube['Kab/Kota'].astype(str).unique())
+
+    os.makedirs(output_dir, exist_ok=True)
+    if 'html' in formats:
+        with open(os.path.join(output_dir, PLOTLY_JS), 'w') as f:
+            f.write(plotly.offline.get_plotlyjs())
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(source,)) as pool:
+        futures = [pool.submit(write_district, output_dir, district, selected, formats)
+                   for district in [None] + districts]
+        for future in futures:
+            future.result()
+
+    manifest = {
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'data_version': data_store.data_version(source),
+        'latest': all_periods[-1].strftime('%Y-%m-%d') if all_periods else None,
+        'periods': [period.strftime('%Y-%m-%d') for period in reversed(selected)],
+        'districts': districts,
+        'formats': list(formats),
+    }
+    _write_index(output_dir, manifest)
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tulis snapshot statis ringkasan, perbandingan wilayah dan komoditas teratas.")
+    parser.add_argument('--source', default=data_store.DATA_FILE)
+    parser.add_argument('--output-dir', default='snapshots')
+    parser.add_argument('--periods', type=int, default=1, help="Jumlah minggu terakhir yang ditulis (0 = semua minggu)")
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=DEFAULT_FORMATS)
+    parser.add_argument('--workers', type=int, help="Jumlah proses worker (default: jumlah CPU)")
+    args = parser.parse_args(argv)
+    if 'png' in args.formats and importlib.util.find_spec('kaleido') is None:
+        parser.error("format png membutuhkan paket kaleido (pip install kaleido)")
+
+    manifest = run_snapshot(args.output_dir, args.source, args.periods, args.formats, args.workers)
+    print(f"Snapshot di {args.output_dir}: {len(manifest['periods'])} minggu x {len(manifest['districts']) + 1} cakupan")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Hasil rolling/disparitas inkremental harus sama dengan perhitungan ulang penuh."""
+import os
+
+import pandas as pd
+import pytest
+
+import analytics
+import data_store
+
+DATA_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), data_store.DATA_FILE)
+
+
+def _cube(df):
+    return analytics.combine_cube(analytics.build_aggregate_cube(df), ['Kab/Kota', 'Periode_Minggu']).reset_index()
+
+
+@pytest.fixture(scope='module')
+def data():
+    pd.set_option('mode.copy_on_write', True)
+    df = data_store.read_source(DATA_FILE)
+    last_week = df['Periode_Minggu'].max()
+    return df[df['Periode_Minggu'] < last_week], df
+
+
+# Revisi satu minggu lama SAMBAS (data.csv dikoreksi di tempat: baris sama, nilai berbeda)
+def _revise(df):
+    week = df.loc[df['Kab/Kota'] == 'SAMBAS', 'Periode_Minggu'].min()
+    revised = (df['Kab/Kota'] == 'SAMBAS') & (df['Periode_Minggu'] == week)
+    df = df.copy()
+    for metric in [analytics.PRICE_CHANGE, analytics.DISPARITY]:
+        df.loc[revised, metric] = df.loc[revised, metric] + 10
+    return df
+
+
+@pytest.mark.parametrize('revise', [False, True], ids=['minggu-baru', 'revisi-histori'])
+def test_rolling_statistics_incremental_matches_full(data, revise):
+    old, full = data
+    previous = analytics.rolling_statistics(_cube(old))
+    cube = _cube(_revise(full) if revise else full)
+    incremental = analytics.rolling_statistics(cube, previous=previous)
+    pd.testing.assert_frame_equal(incremental, analytics.rolling_statistics(cube), check_exact=False)
+
+
+@pytest.mark.parametrize('revise', [False, True], ids=['minggu-baru', 'revisi-histori'])
+def test_provincial_disparity_incremental_matches_full(data, revise):
+    old, full = data
+    previous = analytics.provincial_disparity(_cube(old))
+    cube = _cube(_revise(full) if revise else full)
+    incremental = analytics.provincial_disparity(cube, previous=previous)
+    pd.testing.assert_frame_equal(incremental, analytics.provincial_disparity(cube), check_exact=False)
+
+
+def test_revision_without_new_week_is_recomputed(data):
+    _, full = data
+    cube = _cube(_revise(full))
+    previous = analytics.rolling_statistics(_cube(full))
+    pd.testing.assert_frame_equal(analytics.rolling_statistics(cube, previous=previous),
+                                  analytics.rolling_statistics(cube), check_exact=False)
+    previous = analytics.provincial_disparity(_cube(full))
+    pd.testing.assert_frame_equal(analytics.provincial_disparity(cube, previous=previous),
+                                  analytics.provincial_disparity(cube), check_exact=False)
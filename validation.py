@@ -0,0 +1,191 @@
+"""Validasi vektor untuk file rilis BPS sebelum dinormalisasi dan masuk ke store.
+
+Seluruh file diperiksa dalam satu pass per kolom dengan kernel ``pyarrow.compute``
+(regex RE2, cast string ke angka) atas nilai unik setiap kolom, lalu hasilnya disebar
+ke baris dengan indexing NumPy; tidak ada loop Python per baris:
+
+- skema: nama kolom dinormalisasi (spasi di tepi dibuang) dan kolom wajib harus ada;
+- kunci (Tahun, Bulan, Minggu, No): bilangan bulat dalam rentang, tidak duplikat;
+- kolom angka: angka valid dan dalam rentang. Placeholder seperti "-" dicatat dan
+  dikosongkan, tidak pernah menjadi 0, sehingga angka 0 asli tetap terbedakan;
+- kolom andil komoditas: setiap isian harus mengikuti tata bahasa
+  ``NAMA (angka)`` yang dipisah ";" atau ",". Andil 0 (mis. "BERAS (0)") sah
+  dan hanya dicatat; placeholder seperti "DATA TIDAK TERSEDIA" dikosongkan.
+
+Baris dengan kunci yang tidak valid atau duplikat ditolak; nilai lain yang tidak
+valid dikosongkan. Semua temuan dirangkum dalam laporan ringkas (satu baris per
+pemeriksaan dan kolom, dengan contoh nomor baris file).
+"""
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+KEY_RANGES = {'Tahun': (2000, 2100), 'Bulan': (1, 12), 'Minggu': (1, 5), 'No': (1, 9999)}
+# Kolom teks; wilayah wajib terisi, fluktuasi boleh kosong
+REGION_COLUMNS = ['Provinsi', 'Kab/Kota']
+FLUCTUATION_COLUMN = 'Fluktuasi Harga Tertinggi'
+# Rentang sah kolom angka (batas None berarti terbuka)
+NUMERIC_RANGES = {
+    'Indikator Perubahan Harga (%)': (-100.0, None),
+    'Nilai': (0.0, None),
+    'Disparitas Harga Antar Daerah': (0.0, None),
+}
+COMMODITY_COLUMN = 'Komoditas Andil Perubahan Harga'
+# Urutan kolom file BPS
+REQUIRED_COLUMNS = (list(KEY_RANGES) + REGION_COLUMNS + ['Indikator Perubahan Harga (%)', COMMODITY_COLUMN,
+                    FLUCTUATION_COLUMN, 'Nilai', 'Disparitas Harga Antar Daerah'])
+
+# Isian "tidak ada data" (dibandingkan dalam huruf besar); isian kosong dicatat terpisah
+PLACEHOLDERS = ['-', '--', 'NA', 'N/A', 'NODATA', 'DATA TIDAK TERSEDIA', 'TIDAK TERSEDIA']
+# Catatan teks seperti "tidak tersedia; libur lebaran" juga dianggap placeholder
+PLACEHOLDER_PREFIX = 'TIDAK TERSEDIA'
+
+# Tata bahasa kolom andil: NAMA (angka) dipisah ";" atau ","; desimal boleh memakai koma
+_ANDIL_ENTRY = r'[^;,()]*[^;,()\s][^;,()]*\(\s*-?\d+(?:[.,]\d+)?\s*\)'
+ANDIL_GRAMMAR = rf'\s*{_ANDIL_ENTRY}(?:\s*[;,]\s*{_ANDIL_ENTRY})*\s*[;,]?\s*'
+ZERO_ANDIL = r'\(\s*-?0+(?:[.,]0+)?\s*\)'
+# Angka desimal (titik atau koma) dengan eksponen opsional, setelah spasi tepi dibuang
+NUMBER = r'^[-+]?(?:\d+(?:[.,]\d*)?|[.,]\d+)(?:[eE][-+]?\d+)?$'
+
+REPORT_COLUMNS = ['Pemeriksaan', 'Kolom', 'Tindakan', 'Jumlah', 'Contoh Baris']
+SAMPLE_ROWS = 5
+# Baris 1 file adalah header
+FIRST_LINE = 2
+
+
+class ValidationError(ValueError):
+    def __init__(self, message, report):
+        super().__init__(message)
+        self.report = report
+
+
+class _Report:
+    def __init__(self):
+        self.entries = []
+
+    def add(self, check, column, action, mask):
+        mask = np.asarray(mask, dtype=bool)
+        count = int(mask.sum())
+        if count:
+            samples = (np.flatnonzero(mask)[:SAMPLE_ROWS] + FIRST_LINE).tolist()
+            self.entries.append((check, column, action, count, samples))
+
+    def frame(self):
+        return pd.DataFrame(self.entries, columns=REPORT_COLUMNS)
+
+
+# Kolom sebagai (nilai unik yang sudah di-trim, indeks nilai unik per baris). Pemeriksaan dijalankan
+# sekali per nilai unik lalu disebar ke semua baris dengan indexing NumPy
+def _encode(raw, column):
+    array = pa.array(raw[column], type=pa.string(), from_pandas=True)
+    if isinstance(array, pa.ChunkedArray):
+        array = array.combine_chunks()
+    encoded = pc.dictionary_encode(array.fill_null(''))
+    return pc.utf8_trim_whitespace(encoded.dictionary), encoded.indices.to_numpy(zero_copy_only=False)
+
+
+def _mask(array):
+    return array.fill_null(False).to_numpy(zero_copy_only=False)
+
+
+# Klasifikasi nilai unik: kosong atau placeholder
+def _classify_text(text):
+    upper = pc.utf8_upper(text)
+    empty = _mask(pc.equal(text, ''))
+    placeholder = ~empty & _mask(pc.or_(pc.is_in(upper, value_set=pa.array(PLACEHOLDERS)),
+                                        pc.starts_with(upper, PLACEHOLDER_PREFIX)))
+    return empty, placeholder
+
+
+# Nilai float64 (NaN bila bukan angka) dan mask isian yang berupa angka, per nilai unik
+def _parse_numbers(text):
+    parsed = pc.match_substring_regex(text, NUMBER)
+    numbers = pc.replace_substring(pc.if_else(parsed, text, pa.scalar(None, pa.string())), ',', '.')
+    return pc.cast(numbers, pa.float64()).to_numpy(zero_copy_only=False), _mask(parsed)
+
+
+def _check_numeric(raw, column, low, high, report):
+    text, rows = _encode(raw, column)
+    values, parsed = _parse_numbers(text)
+    empty, placeholder = _classify_text(text)
+    with np.errstate(invalid='ignore'):
+        out_of_range = parsed & ((values < (-np.inf if low is None else low)) | (values > (np.inf if high is None else high)))
+
+    report.add('placeholder', column, 'dikosongkan', placeholder[rows])
+    report.add('bukan angka', column, 'dikosongkan', (~parsed & ~empty & ~placeholder)[rows])
+    report.add('di luar rentang', column, 'dikosongkan', out_of_range[rows])
+    report.add('nol', column, 'dicatat', (values == 0)[rows])
+    return np.where(out_of_range, np.nan, values)[rows]
+
+
+def _check_commodity(raw, report):
+    text, rows = _encode(raw, COMMODITY_COLUMN)
+    empty, placeholder = _classify_text(text)
+    grammar_ok = _mask(pc.match_substring_regex(text, f'^(?:{ANDIL_GRAMMAR})$'))
+    has_zero = grammar_ok & _mask(pc.match_substring_regex(text, ZERO_ANDIL))
+
+    report.add('placeholder', COMMODITY_COLUMN, 'dikosongkan', placeholder[rows])
+    report.add('tata bahasa andil', COMMODITY_COLUMN, 'dikosongkan', (~empty & ~placeholder & ~grammar_ok)[rows])
+    report.add('andil nol', COMMODITY_COLUMN, 'dicatat', has_zero[rows])
+    valid = pc.if_else(grammar_ok, text, pa.scalar(None, pa.string()))
+    return pd.array(pc.take(valid, rows), dtype='string[pyarrow]')
+
+
+# Validasi frame mentah (semua kolom dibaca sebagai teks).
+# Mengembalikan (frame tervalidasi dengan kunci integer dan kolom angka float, laporan)
+def validate_frame(raw):
+    report = _Report()
+    columns = pd.Index(raw.columns).str.strip()
+    duplicated = columns[columns.duplicated()].unique().tolist()
+    missing = [col for col in REQUIRED_COLUMNS if col not in columns]
+    if duplicated or missing:
+        problems = [f"kolom wajib tidak ada: {', '.join(missing)}"] if missing else []
+        problems += [f"kolom ganda: {', '.join(duplicated)}"] if duplicated else []
+        entries = [('skema', col, 'file ditolak', 1, []) for col in missing + duplicated]
+        raise ValidationError("; ".join(problems), pd.DataFrame(entries, columns=REPORT_COLUMNS))
+    raw = raw.set_axis(columns, axis=1)
+    for col in columns.difference(REQUIRED_COLUMNS):
+        report.add('kolom tidak dikenal', col, 'diabaikan', np.ones(1, dtype=bool))
+
+    rejected = np.zeros(len(raw), dtype=bool)
+    keys = {}
+    for col, (low, high) in KEY_RANGES.items():
+        text, rows = _encode(raw, col)
+        values, parsed = _parse_numbers(text)
+        with np.errstate(invalid='ignore'):
+            not_integer = (~parsed | (values % 1 != 0))[rows]
+            out_of_range = ~not_integer & ((values < low) | (values > high))[rows]
+        values = values[rows]
+        report.add('bukan bilangan bulat', col, 'baris ditolak', not_integer)
+        report.add('di luar rentang', col, 'baris ditolak', out_of_range)
+        rejected |= not_integer | out_of_range
+        keys[col] = np.where(not_integer | out_of_range, 0, np.nan_to_num(values)).astype('int64')
+
+    for col in REGION_COLUMNS:
+        text, rows = _encode(raw, col)
+        empty = _mask(pc.equal(text, ''))[rows]
+        report.add('kosong', col, 'baris ditolak', empty)
+        rejected |= empty
+
+    # Kunci duplikat dalam satu file (di antara baris yang lolos): kemunculan pertama dipertahankan
+    duplicate = np.zeros(len(raw), dtype=bool)
+    duplicate[~rejected] = pd.DataFrame(keys)[~rejected].duplicated(keep='first').to_numpy()
+    report.add('kunci duplikat', ', '.join(KEY_RANGES), 'baris ditolak', duplicate)
+    rejected |= duplicate
+
+    df = pd.DataFrame(keys)
+    for col in REGION_COLUMNS + [FLUCTUATION_COLUMN]:
+        df[col] = raw[col].to_numpy()
+    for col, (low, high) in NUMERIC_RANGES.items():
+        df[col] = _check_numeric(raw, col, low, high, report)
+    df[COMMODITY_COLUMN] = _check_commodity(raw, report)
+
+    df = df[REQUIRED_COLUMNS][~rejected].reset_index(drop=True)
+    return df, report.frame()
+
+
+# Ringkasan satu baris untuk log; satu baris file dapat muncul di beberapa pemeriksaan
+def summarize_report(report, rejected_rows):
+    cleared = report.loc[report['Tindakan'] == 'dikosongkan', 'Jumlah'].sum()
+    return f"{rejected_rows} baris ditolak, {cleared} nilai dikosongkan, {len(report)} temuan"